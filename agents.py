@@ -1,21 +1,26 @@
 import os
-import json
+import orjson
 import subprocess
 import logging
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from langchain_community.llms import Ollama
-from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import LLMChain
-import datetime
 import requests
+import httpx
+import hashlib
+import shlex
 from urllib.parse import quote_plus
 import re
 import asyncio
-from core.command import run_command_async
+import functools
+import threading
+import time
+from collections import OrderedDict
+from core.clock import iso_now
+from core.command import load_infra, run_command_async
 from core.command_map import get_command
-import yaml
+from core.llm_batcher import HTTP_LIMITS, KEEP_ALIVE
+from core.loop import get_loop, on_shutdown, run as run_on_loop
+from core.plan_rules import STEP_FIELDS, is_risky
 
 # Configure logging
 logging.basicConfig(
@@ -32,30 +37,63 @@ try:
     if not os.path.exists(CONFIG_FILE):
         raise FileNotFoundError(f"Configuration file not found: {CONFIG_FILE}")
     
-    with open(CONFIG_FILE, 'r') as f:
-        infra_config = json.load(f)
-        
-        if not isinstance(infra_config, dict):
-            raise ValueError("Invalid configuration format: expected a dictionary")
-        
-        # Validate the configuration
-        required_fields = ["ip", "os", "services"]
-        for server, config in infra_config.items():
-            missing_fields = [field for field in required_fields if field not in config]
-            if missing_fields:
-                raise ValueError(f"Missing required fields {missing_fields} in configuration for server {server}")
-        
-        logger.info(f"Successfully loaded configuration for {len(infra_config)} servers")
+    infra_config = load_infra(CONFIG_FILE)['servers']
+    
+    if not isinstance(infra_config, dict):
+        raise ValueError("Invalid configuration format: expected a dictionary")
+    
+    # Validate the configuration
+    required_fields = ["ip", "os", "services"]
+    for server, config in infra_config.items():
+        missing_fields = [field for field in required_fields if field not in config]
+        if missing_fields:
+            raise ValueError(f"Missing required fields {missing_fields} in configuration for server {server}")
+    
+    logger.info("Successfully loaded configuration for %s servers", len(infra_config))
 except Exception as e:
-    logger.error(f"Error loading infrastructure configuration: {str(e)}", exc_info=True)
+    logger.error("Error loading infrastructure configuration: %s", e, exc_info=True)
     infra_config = {}  # Initialize with empty dict to prevent NoneType errors
 
-llm = Ollama(
-    model="mistral",
-    temperature=0.2,  # Lower temperature for more consistent responses
-    stop=["</s>", "```json"],  # Stop tokens to ensure clean JSON output
-)
-memory = ConversationBufferMemory()
+# Lowercased service name -> (server, ip) of the first server running it
+_SERVICE_INDEX = {}
+# Server -> lowercased names of the services it runs
+_SERVER_SERVICES = {}
+for _server, _config in infra_config.items():
+    for _svc in _config.get("services", []):
+        _SERVICE_INDEX.setdefault(_svc.lower(), (_server, _config["ip"]))
+    _SERVER_SERVICES[_server] = frozenset(_svc.lower() for _svc in _config.get("services", []))
+
+# 4-bit quantized weights roughly double decode throughput; num_predict caps worst-case latency
+LLM_MODEL = "mistral:7b-instruct-q4_K_M"
+
+# The clients are built on first use: importing langchain_community dominates import time.
+# Each request sets how long Ollama keeps the model loaded, so they send the same keep_alive as
+# the warmup pings; otherwise every dashboard call would reset it to Ollama's 5-minute default
+@functools.lru_cache(maxsize=None)
+def _get_llm():
+    from langchain_community.llms import Ollama
+    return Ollama(
+        model=LLM_MODEL,
+        temperature=0.2,  # Lower temperature for more consistent responses
+        stop=["</s>", "```json"],  # Stop tokens to ensure clean JSON output
+        num_ctx=4096,
+        num_predict=512,
+        keep_alive=KEEP_ALIVE,
+    )
+
+# Separate client for structured output: Ollama's JSON mode constrains decoding
+# to valid JSON, so the response never carries surrounding prose or backticks
+@functools.lru_cache(maxsize=None)
+def _get_json_llm():
+    from langchain_community.llms import Ollama
+    return Ollama(
+        model=LLM_MODEL,
+        temperature=0.2,
+        format="json",
+        num_ctx=4096,
+        num_predict=512,
+        keep_alive=KEEP_ALIVE,
+    )
 
 @dataclass
 class ServerCommand:
@@ -240,13 +278,29 @@ CATEGORY_DEFINITIONS = {
     }
 }
 
-def get_or_create_event_loop():
-    try:
-        return asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop
+# One HTTP client for the process, owned by the shared event loop: pooled connections cannot cross loops
+_http_client = None
+_http_client_loop = None
+# Same pool sizing as the Ollama client; lookups, unlike generation, also bound the read
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client; only usable from coroutines on the shared loop"""
+    global _http_client, _http_client_loop
+    loop = get_loop()
+    if asyncio.get_running_loop() is not loop:
+        raise RuntimeError("The shared HTTP client is bound to the core.loop event loop")
+    # A forked child has its own loop and must not use the parent's connections
+    if _http_client is None or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+        _http_client_loop = loop
+    return _http_client
+
+@on_shutdown
+async def _close_http_client():
+    """Close the pooled connections of the shared client"""
+    if _http_client is not None and _http_client_loop is get_loop():
+        await _http_client.aclose()
 
 def get_api_information(service: str, query: str) -> Dict:
     """Get API information from knowledge base or web search"""
@@ -281,7 +335,7 @@ def get_api_information(service: str, query: str) -> Dict:
                 "error": "Failed to fetch online documentation"
             }
     except Exception as e:
-        logger.error(f"Error searching API documentation: {str(e)}", exc_info=True)
+        logger.error("Error searching API documentation: %s", e, exc_info=True)
         return {
             "status": "error",
             "error": str(e)
@@ -289,39 +343,58 @@ def get_api_information(service: str, query: str) -> Dict:
 
 def classify_issue(issue: str) -> Tuple[str, str, str]:
     """Classify the issue type and identify relevant service"""
-    issue = issue.lower()
+    # Normalize before the cache so retries differing only in case/padding hit it
+    return _classify_normalized(issue.strip().lower())
+
+def _any_of(patterns: List[str]) -> re.Pattern:
+    """One compiled alternation that matches wherever any of the patterns would"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+# Classification patterns, compiled once
+_API_SERVICE_RES = [(service, _any_of(patterns))
+                    for service, patterns in CATEGORY_DEFINITIONS["api_query"]["services"].items()]
+_INFRA_RE = _any_of(CATEGORY_DEFINITIONS["general_query"]["patterns"]["infrastructure"])
+_TARGET_RE = _any_of(CATEGORY_DEFINITIONS["general_query"]["patterns"]["targets"])
+_KNOWLEDGE_RE = _any_of(CATEGORY_DEFINITIONS["knowledge_query"]["patterns"]["question_types"] +
+                        CATEGORY_DEFINITIONS["knowledge_query"]["patterns"]["learning_indicators"])
+_RESOLUTION_RE = _any_of(CATEGORY_DEFINITIONS["needs_resolution"]["patterns"]["error_indicators"] +
+                         CATEGORY_DEFINITIONS["needs_resolution"]["patterns"]["severity_indicators"])
+# Requests for an overview of the whole infrastructure are routed without the pattern cascade,
+# unless they also report a problem ("nginx status: down on web servers")
+_OVERVIEW_RE = re.compile(r"\b(overview|list|show|status)\b.*\b(infra|infrastructure|servers?)\b")
+
+def _infra_service(issue: str) -> str:
+    """Identify the service an infrastructure query mentions, if any"""
+    if "mysql" in issue or "database" in issue or "db" in issue:
+        return "mysql"
+    elif "tomcat" in issue or "web server" in issue or "web" in issue or "nginx" in issue:
+        return "nginx"
+    elif "memcache" in issue or "cache" in issue:
+        return "memcache"
+    elif "rabbitmq" in issue or "queue" in issue or "rabbit" in issue:
+        return "rabbitmq"
+    return ""
+
+@functools.lru_cache(maxsize=4096)
+def _classify_normalized(issue: str) -> Tuple[str, str, str]:
+    if _OVERVIEW_RE.search(issue) and not _RESOLUTION_RE.search(issue):
+        return "general_query", _infra_service(issue), "Matched patterns: infrastructure_overview"
     
     # Check for API queries first
-    for service, patterns in CATEGORY_DEFINITIONS["api_query"]["services"].items():
-        if any(re.search(pattern, issue) for pattern in patterns):
+    for service, pattern in _API_SERVICE_RES:
+        if pattern.search(issue):
             return "api_query", service, f"Matched patterns: api_indicators, api_indicators"
     
     # Check for infrastructure queries
-    infra_patterns = CATEGORY_DEFINITIONS["general_query"]["patterns"]
-    if (any(re.search(pattern, issue) for pattern in infra_patterns["infrastructure"]) and
-        any(re.search(pattern, issue) for pattern in infra_patterns["targets"])):
-        # Identify service if mentioned
-        service = ""
-        if "mysql" in issue or "database" in issue or "db" in issue:
-            service = "mysql"
-        elif "tomcat" in issue or "web server" in issue or "web" in issue or "nginx" in issue:
-            service = "nginx"
-        elif "memcache" in issue or "cache" in issue:
-            service = "memcache"
-        elif "rabbitmq" in issue or "queue" in issue or "rabbit" in issue:
-            service = "rabbitmq"
-        return "general_query", service, "Matched patterns: infrastructure, targets"
+    if _INFRA_RE.search(issue) and _TARGET_RE.search(issue):
+        return "general_query", _infra_service(issue), "Matched patterns: infrastructure, targets"
     
     # Check for knowledge queries
-    knowledge_patterns = CATEGORY_DEFINITIONS["knowledge_query"]["patterns"]
-    if (any(re.search(pattern, issue) for pattern in knowledge_patterns["question_types"]) or
-        any(re.search(pattern, issue) for pattern in knowledge_patterns["learning_indicators"])):
+    if _KNOWLEDGE_RE.search(issue):
         return "knowledge_query", "", "Matched patterns: question_types"
     
     # Check for issues needing resolution
-    resolution_patterns = CATEGORY_DEFINITIONS["needs_resolution"]["patterns"]
-    if (any(re.search(pattern, issue) for pattern in resolution_patterns["error_indicators"]) or
-        any(re.search(pattern, issue) for pattern in resolution_patterns["severity_indicators"])):
+    if _RESOLUTION_RE.search(issue):
         # Identify service if mentioned
         service = ""
         if "mysql" in issue or "database" in issue:
@@ -378,6 +451,30 @@ def run_command_safely(cmd: str, timeout: int = 30) -> Tuple[bool, str, int]:
     except Exception as e:
         return False, f"Error executing command: {str(e)}", -1
 
+async def run_command_safely_async(cmd: str, timeout: int = 30) -> Tuple[bool, str, int]:
+    """Async variant of run_command_safely that does not block the event loop"""
+    try:
+        proc = await asyncio.create_subprocess_shell(
+            cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return False, f"Command timed out after {timeout} seconds", -1
+        
+        # Check return code
+        success = proc.returncode == 0
+        output = stdout.decode() if success else f"{stdout.decode()}\n{stderr.decode()}".strip()
+        
+        return success, output, proc.returncode
+        
+    except Exception as e:
+        return False, f"Error executing command: {str(e)}", -1
+
 def run_commands_on_server(ip: str, commands: List[ServerCommand], server_name: str) -> Dict:
     """Execute commands on a server and return results"""
     results = []
@@ -395,7 +492,7 @@ def run_commands_on_server(ip: str, commands: List[ServerCommand], server_name:
             "success": success and (return_code == cmd.expected_return_code),
             "output": output,
             "return_code": return_code,
-            "timestamp": datetime.datetime.now().isoformat()
+            "timestamp": iso_now()
         })
     
     return {
@@ -508,7 +605,7 @@ class ClassifierAgent:
         """Classify a user query into one of the supported query types"""
         try:
             category, service, reason = classify_issue(query)
-            logger.info(f"Query classified as {category} for service {service}: {reason}")
+            logger.info("Query classified as %s for service %s: %s", category, service, reason)
             
             return {
                 "status": "success",
@@ -517,7 +614,7 @@ class ClassifierAgent:
                 "reason": reason
             }
         except Exception as e:
-            logger.error(f"Error classifying query: {str(e)}", exc_info=True)
+            logger.error("Error classifying query: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "error": f"Failed to classify query: {str(e)}"
@@ -526,10 +623,10 @@ class ClassifierAgent:
 class InfrastructureQueryAgent:
     """Agent responsible for handling infrastructure-related queries"""
     
-    def process_query(self, user_query: str, service: str = "") -> Dict:
+    async def process_query(self, user_query: str, service: str = "") -> Dict:
         """Process queries related to infrastructure status"""
         try:
-            logger.info(f"Processing infrastructure query for service: {service}")
+            logger.info("Processing infrastructure query for service: %s", service)
             
             # Initialize server_name
             server_name = None
@@ -538,7 +635,7 @@ class InfrastructureQueryAgent:
             for server in infra_config.keys():
                 if server.lower() in user_query.lower():
                     server_name = server
-                    logger.info(f"Found server name in query: {server_name}")
+                    logger.info("Found server name in query: %s", server_name)
                     break
             
             # Check for explicit commands like ping, ls, cat, etc.
@@ -564,15 +661,15 @@ class InfrastructureQueryAgent:
                             # Since infra_config now uses legacy names directly, we can check there
                             if server_word in infra_config:
                                 server_name = server_word
-                                logger.info(f"Found server in 'command on server' format: {server_name}")
+                                logger.info("Found server in 'command on server' format: %s", server_name)
                             # Case where server name might be slightly different in query vs config
                             elif any(s for s in infra_config.keys() if server_word in s.lower()):
                                 server_name = next(s for s in infra_config.keys() if server_word in s.lower())
-                                logger.info(f"Found similar server in 'command on server' format: {server_name}")
+                                logger.info("Found similar server in 'command on server' format: %s", server_name)
                             
                             # Format the command without "command on"
                             command = f"{cmd}"
-                            logger.info(f"Extracted command from 'command on' format: {command}")
+                            logger.info("Extracted command from 'command on' format: %s", command)
                     else:
                         # Normal command extraction
                         for i in range(cmd_index, len(query_words)):
@@ -581,7 +678,7 @@ class InfrastructureQueryAgent:
                                 break
                             command_parts.append(query_words[i])
                         command = ' '.join(command_parts)
-                        logger.info(f"Extracted explicit command: {command}")
+                        logger.info("Extracted explicit command: %s", command)
                         
                         # Check if this command mentions any servers
                         target_server = None
@@ -591,7 +688,7 @@ class InfrastructureQueryAgent:
                                 if word == srv.lower():
                                     target_server = srv
                                     server_name = target_server
-                                    logger.info(f"Command targets server: {target_server}")
+                                    logger.info("Command targets server: %s", target_server)
                                     break
                     break
             
@@ -605,8 +702,8 @@ class InfrastructureQueryAgent:
                     if service:
                         break
             
-            results = {}
-            # Execute on relevant servers
+            # Select the relevant servers
+            targets = []
             for server, config in infra_config.items():
                 # If a specific server was mentioned, only query that one
                 if server_name and server != server_name:
@@ -616,21 +713,27 @@ class InfrastructureQueryAgent:
                 if service and service not in config["services"]:
                     continue
                 
-                # Use LLM to generate appropriate commands based on query and server context
-                if not command:
-                    command = generate_commands_with_llm(user_query, server, config)
-                    logger.info(f"Using LLM-generated command: '{command}' for server {server}")
-                    
-                # Use new async remote/OS-aware runner
-                loop = get_or_create_event_loop()
-                cmd_result = loop.run_until_complete(
-                    run_command_async(command, user='system', server=server, metric=None)
-                )
-                results[server] = {
+                targets.append((server, config))
+            
+            # Use LLM to generate appropriate commands based on query and the first server's context
+            if targets and not command:
+                server, config = targets[0]
+                command = await asyncio.to_thread(generate_commands_with_llm, user_query, server, config)
+                logger.info("Using LLM-generated command: '%s' for server %s", command, server)
+            
+            # Run on all servers concurrently with the async remote/OS-aware runner
+            cmd_results = await asyncio.gather(*(
+                run_command_async(command, user='system', server=server, metric=None)
+                for server, _ in targets
+            ))
+            results = {
+                server: {
                     "ip": config["ip"],
                     "services": config["services"],
                     "commands": [cmd_result]
                 }
+                for (server, config), cmd_result in zip(targets, cmd_results)
+            }
                     
             if not results:
                 return {
@@ -645,36 +748,53 @@ class InfrastructureQueryAgent:
                 "results": results
             }
         except Exception as e:
-            logger.error(f"Error processing infrastructure query: {str(e)}", exc_info=True)
+            logger.error("Error processing infrastructure query: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "type": "infrastructure_query",
                 "error": f"Failed to process infrastructure query: {str(e)}"
             }
 
-class GeneralKnowledgeAgent:
-    """Agent responsible for handling general knowledge queries using LLM"""
-    
-    def process_query(self, user_query: str) -> Dict:
-        """Process general knowledge queries using the LLM's inherent knowledge"""
-        try:
-            logger.info(f"Processing knowledge query: {user_query}")
-            
-            # Create a prompt for the LLM
-            prompt = PromptTemplate(
-                input_variables=["query"],
-                template="""
+KNOWLEDGE_AGENT_PROMPT = """
                 You are an expert IT support professional. Please answer the following question with detailed, accurate information:
                 
                 Question: {query}
                 
                 Provide a clear, concise, and technically accurate response that demonstrates expert knowledge on the topic.
                 """
-            )
+
+# Knowledge answers do not depend on live infrastructure state, so repeated questions are served from memory
+KNOWLEDGE_CACHE_SIZE = 512
+
+class GeneralKnowledgeAgent:
+    """Agent responsible for handling general knowledge queries using LLM"""
+    
+    def __init__(self):
+        # Normalized question -> LLM answer, least recently used first
+        self._answers = OrderedDict()
+        self._answers_lock = threading.Lock()
+    
+    async def process_query(self, user_query: str) -> Dict:
+        """Process general knowledge queries using the LLM's inherent knowledge"""
+        try:
+            logger.info("Processing knowledge query: %s", user_query)
             
-            # Generate answer using LLM
-            chain = LLMChain(llm=llm, prompt=prompt)
-            answer = chain.run(query=user_query)
+            # Questions differing only in case or spacing share an answer
+            key = " ".join(user_query.lower().split())
+            with self._answers_lock:
+                answer = self._answers.get(key)
+                if answer is not None:
+                    self._answers.move_to_end(key)
+            
+            if answer is None:
+                # Generate answer using LLM
+                answer = await _get_llm().ainvoke(KNOWLEDGE_AGENT_PROMPT.format(query=user_query))
+                with self._answers_lock:
+                    self._answers[key] = answer
+                    while len(self._answers) > KNOWLEDGE_CACHE_SIZE:
+                        self._answers.popitem(last=False)
+            else:
+                logger.info("Answering knowledge query from cache")
             
             # Format the response
             return {
@@ -690,7 +810,7 @@ class GeneralKnowledgeAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error processing knowledge query: {str(e)}", exc_info=True)
+            logger.error("Error processing knowledge query: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "type": "knowledge_query", 
@@ -718,29 +838,7 @@ class GeneralKnowledgeAgent:
             "query": query
         }
 
-class ResolverAgent:
-    """Agent responsible for generating resolution plans for identified issues"""
-    
-    def generate_resolution(self, issue: str, service: str) -> Dict:
-        """Generate resolution steps for an issue"""
-        try:
-            # Get relevant server information
-            target_server = None
-            for server, config in infra_config.items():
-                if service in config["services"]:
-                    target_server = server
-                    break
-            
-            if not target_server:
-                return {
-                    "status": "error",
-                    "error": f"No server found running service: {service}"
-                }
-            
-            # Generate resolution steps using LLM
-            prompt = PromptTemplate(
-                input_variables=["issue", "service", "server"],
-                template="""
+RESOLUTION_PROMPT = """
                 Given the following issue with {service} on {server}, provide a detailed resolution plan:
                 
                 Issue: {issue}
@@ -770,28 +868,63 @@ class ResolverAgent:
                     "prerequisites": ["required preparations"]
                 }}
                 """
-            )
-            
-            # Generate resolution plan
-            chain = LLMChain(llm=llm, prompt=prompt)
-            response = chain.run(issue=issue, service=service, server=target_server)
+
+# Retried or resubmitted issues reuse the plan generated for them; plans go stale as the
+# infrastructure changes, so they are only reused for a while
+RESOLUTION_CACHE_SIZE = 2048
+RESOLUTION_CACHE_TTL = 600
+
+class ResolverAgent:
+    """Agent responsible for generating resolution plans for identified issues"""
+    
+    def __init__(self):
+        # (normalized issue, service) -> (expiry on the monotonic clock, LLM response that parsed), least recently used first
+        self._plans = OrderedDict()
+        self._plans_lock = threading.Lock()
+    
+    async def generate_resolution(self, issue: str, service: str) -> Dict:
+        """Generate resolution steps for an issue"""
+        try:
+            # Get relevant server information
+            target_server, _ = _SERVICE_INDEX.get((service or "").lower(), (None, None))
             
-            try:
-                resolution = json.loads(response)
-            except json.JSONDecodeError:
-                logger.error("Failed to parse LLM response as JSON", exc_info=True)
+            if not target_server:
                 return {
                     "status": "error",
-                    "error": "Failed to generate valid resolution plan"
+                    "error": f"No server found running service: {service}"
                 }
             
+            key = (" ".join(issue.lower().split()), service)
+            now = time.monotonic()
+            with self._plans_lock:
+                expires, response = self._plans.get(key, (0.0, None))
+                if expires > now:
+                    self._plans.move_to_end(key)
+                else:
+                    response = None
+            
+            if response is None:
+                # Generate resolution plan. JSON mode constrains the output, but num_predict can still
+                # cut it off mid-object, so it is only cached once it has parsed
+                response = await _get_json_llm().ainvoke(RESOLUTION_PROMPT.format(issue=issue, service=service, server=target_server))
+                resolution = orjson.loads(response)
+                with self._plans_lock:
+                    self._plans[key] = (now + RESOLUTION_CACHE_TTL, response)
+                    self._plans.move_to_end(key)
+                    while len(self._plans) > RESOLUTION_CACHE_SIZE:
+                        self._plans.popitem(last=False)
+            else:
+                logger.info("Reusing resolution plan generated for the same issue")
+                # Parsed per call so each ticket gets its own copy of the plan
+                resolution = orjson.loads(response)
+            
             return {
                 "status": "success",
                 "resolution": resolution
             }
             
         except Exception as e:
-            logger.error(f"Error generating resolution: {str(e)}", exc_info=True)
+            logger.error("Error generating resolution: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "error": f"Failed to generate resolution: {str(e)}"
@@ -861,22 +994,8 @@ class ValidatorAgent:
             
             # Check each step
             for i, step in enumerate(resolution["resolution_steps"]):
-                step_issues = []
-                
-                # Check required step fields
-                step_fields = ["step", "purpose", "validation"]
-                missing_step_fields = [field for field in step_fields if not step.get(field)]
-                if missing_step_fields:
-                    step_issues.append(f"Missing fields: {', '.join(missing_step_fields)}")
-                
-                # Check if validation command exists
-                if not step.get("validation"):
-                    step_issues.append("No validation command")
-                
-                # Suggest adding rollback for risky operations
-                risky_terms = ["remove", "delete", "drop", "truncate", "restart", "stop"]
-                if any(term in step["step"].lower() for term in risky_terms) and not step.get("rollback"):
-                    step_issues.append("Missing rollback procedure for risky operation")
+                step_issues, risky_without_rollback = self._check_step(step)
+                if risky_without_rollback:
                     risks_identified.append(f"Step {i+1} involves risky operation without rollback")
                 
                 if step_issues:
@@ -908,7 +1027,7 @@ class ValidatorAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error validating resolution: {str(e)}", exc_info=True)
+            logger.error("Error validating resolution: %s", e, exc_info=True)
             return {
                 "approved": False,
                 "confidence": 0.0,
@@ -917,13 +1036,33 @@ class ValidatorAgent:
                 "suggested_modifications": ["Fix validation errors"]
             }
 
+    def _check_step(self, step: Dict) -> Tuple[List[str], bool]:
+        """Return the issues found in a single resolution step and whether it is risky without rollback"""
+        step_issues = []
+        
+        # Check required step fields
+        missing_step_fields = [field for field in STEP_FIELDS if not step.get(field)]
+        if missing_step_fields:
+            step_issues.append(f"Missing fields: {', '.join(missing_step_fields)}")
+        
+        # Check if validation command exists
+        if not step.get("validation"):
+            step_issues.append("No validation command")
+        
+        # Suggest adding rollback for risky operations
+        risky_without_rollback = is_risky(step.get("step", "")) and not step.get("rollback")
+        if risky_without_rollback:
+            step_issues.append("Missing rollback procedure for risky operation")
+        
+        return step_issues, risky_without_rollback
+
 class ApiQueryAgent:
     """Agent responsible for handling API-related queries and documentation"""
     
-    def process_query(self, service: str, query: str) -> Dict:
+    async def process_query(self, service: str, query: str) -> Dict:
         """Process API queries and return relevant documentation"""
         try:
-            logger.info(f"Processing API query for service: {service}")
+            logger.info("Processing API query for service: %s", service)
             
             # Check knowledge base first
             if service.lower() in KNOWLEDGE_BASE:
@@ -937,7 +1076,7 @@ class ApiQueryAgent:
             # If not in knowledge base, search online
             search_query = f"{service} API documentation endpoints"
             search_url = f"https://api.duckduckgo.com/?q={quote_plus(search_query)}&format=json"
-            response = requests.get(search_url)
+            response = await get_http_client().get(search_url)
             
             if response.status_code == 200:
                 return {
@@ -957,20 +1096,29 @@ class ApiQueryAgent:
                 }
                 
         except Exception as e:
-            logger.error(f"Error processing API query: {str(e)}", exc_info=True)
+            logger.error("Error processing API query: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "type": "api_query",
                 "error": f"Failed to process API query: {str(e)}"
             }
 
+def command_key(command: str) -> bytes:
+    """Content-addressed key for a shell command, insensitive to whitespace and quoting style"""
+    try:
+        normalized = shlex.join(shlex.split(command))
+    except ValueError:
+        # Unbalanced quotes: fall back to the raw command
+        normalized = command.strip()
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
 class ExecutorAgent:
     """Agent responsible for executing approved resolutions"""
     
     def __init__(self):
         self.execution_log = []
     
-    def execute_remediation(self, execution_data: Dict) -> Dict:
+    async def execute_remediation(self, execution_data: Dict) -> Dict:
         """Execute approved remediation steps with safety checks"""
         try:
             server_name = execution_data.get("server")
@@ -986,15 +1134,15 @@ class ExecutorAgent:
 
             server_info = infra_config.get(server_name)
             if not server_info:
-                logger.error(f"Server {server_name} not found in configuration")
+                logger.error("Server %s not found in configuration", server_name)
                 return {
                     "status": "error",
                     "error": f"Server {server_name} not found in configuration"
                 }
 
             # Verify service is running on server
-            if service and service.lower() not in [s.lower() for s in server_info["services"]]:
-                logger.error(f"Service {service} not found on server {server_name}")
+            if service and service.lower() not in _SERVER_SERVICES[server_name]:
+                logger.error("Service %s not found on server %s", service, server_name)
                 return {
                     "status": "error",
                     "error": f"Service {service} is not configured on {server_name}"
@@ -1002,34 +1150,42 @@ class ExecutorAgent:
 
             results = []
             execution_successful = True
+            # Results of commands already run in this remediation, keyed by command_key
+            seen = {}
             
             for step in steps:
                 step_cmd = step.get("validation", "")  # Use validation command as the actual command
                 if not step_cmd:
-                    logger.warning(f"No validation command for step: {step.get('step', 'Unknown step')}")
+                    logger.warning("No validation command for step: %s", step.get('step', 'Unknown step'))
                     continue
 
-                logger.info(f"Executing step: {step.get('step')} on {server_name}")
-                
-                # Execute the validation command
-                cmd_result = self._execute_step(
-                    server_info["ip"],
-                    step_cmd,
-                    server_name,
-                    timeout=300  # 5 minutes max per step
-                )
+                key = command_key(step_cmd)
+                if key in seen:
+                    logger.info("Reusing result of identical command for step: %s", step.get('step'))
+                    cmd_result = seen[key]
+                else:
+                    logger.info("Executing step: %s on %s", step.get('step'), server_name)
+                    
+                    # Execute the validation command
+                    cmd_result = await self._execute_step(
+                        server_info["ip"],
+                        step_cmd,
+                        server_name,
+                        timeout=300  # 5 minutes max per step
+                    )
+                    seen[key] = cmd_result
 
                 step_result = {
                     "step": step.get("step", ""),
                     "command": step_cmd,
                     "result": cmd_result,
-                    "timestamp": datetime.datetime.now().isoformat()
+                    "timestamp": iso_now()
                 }
 
                 # If step failed and has rollback, execute rollback
                 if not cmd_result.get("success") and step.get("rollback"):
-                    logger.warning(f"Step failed, executing rollback: {step.get('rollback')}")
-                    rollback_result = self._execute_step(
+                    logger.warning("Step failed, executing rollback: %s", step.get('rollback'))
+                    rollback_result = await self._execute_step(
                         server_info["ip"],
                         step["rollback"],
                         server_name,
@@ -1044,7 +1200,7 @@ class ExecutorAgent:
             execution_record = {
                 "server": server_name,
                 "service": service,
-                "timestamp": datetime.datetime.now().isoformat(),
+                "timestamp": iso_now(),
                 "results": results,
                 "successful": execution_successful
             }
@@ -1057,20 +1213,20 @@ class ExecutorAgent:
             }
 
         except Exception as e:
-            logger.error(f"Error executing remediation: {str(e)}", exc_info=True)
+            logger.error("Error executing remediation: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "error": f"Execution failed: {str(e)}"
             }
     
-    def _execute_step(self, ip: str, command: str, server_name: str, timeout: int = 300) -> Dict:
+    async def _execute_step(self, ip: str, command: str, server_name: str, timeout: int = 300) -> Dict:
         """Execute a single step and return the result"""
-        success, output, return_code = run_command_safely(command, timeout)
+        success, output, return_code = await run_command_safely_async(command, timeout)
         return {
             "success": success,
             "output": output,
             "return_code": return_code,
-            "timestamp": datetime.datetime.now().isoformat()
+            "timestamp": iso_now()
         }
     
     def get_execution_log(self) -> List[Dict]:
@@ -1088,8 +1244,15 @@ class SupportCrew:
         self.validator = ValidatorAgent()
         self.executor = ExecutorAgent()
         self.api_agent = ApiQueryAgent()
+        # Query category -> pipeline that handles it
+        self._handlers = {
+            "general_query": self._handle_general,
+            "knowledge_query": self._handle_knowledge,
+            "api_query": self._handle_api,
+            "needs_resolution": self._handle_resolution,
+        }
         
-    def process_request(self, query: str) -> Dict:
+    async def process_request(self, query: str) -> Dict:
         """Process a user request through the appropriate agent pipeline"""
         try:
             # Step 1: Classify the query
@@ -1102,64 +1265,90 @@ class SupportCrew:
             service = classification["service"]
             
             # Step 2: Route to appropriate agent
-            if category == "general_query":
-                return self.infra_agent.process_query(query, service)
-                
-            elif category == "knowledge_query":
-                return self.knowledge_agent.process_query(query)
-                
-            elif category == "api_query":
-                return self.api_agent.process_query(service, query)
-                
-            elif category == "needs_resolution":
-                # Generate resolution
-                resolution_result = self.resolver.generate_resolution(query, service)
-                
-                if resolution_result["status"] != "success":
-                    return resolution_result
-                    
-                # Validate resolution
-                validation = self.validator.validate_resolution(resolution_result["resolution"])
-                
-                return {
-                    "status": "success",
-                    "type": "resolution",
-                    "resolution": resolution_result["resolution"],
-                    "validation": validation
-                }
-                
-            else:
+            handler = self._handlers.get(category)
+            if handler is None:
                 return {
                     "status": "error",
                     "error": f"Unknown query category: {category}"
                 }
+            return await handler(query, service)
                 
         except Exception as e:
-            logger.error(f"Error processing request: {str(e)}", exc_info=True)
+            logger.error("Error processing request: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "error": f"Failed to process request: {str(e)}"
             }
             
-    def execute_resolution(self, resolution_data: Dict) -> Dict:
+    async def _handle_general(self, query: str, service: str) -> Dict:
+        return await self.infra_agent.process_query(query, service)
+    
+    async def _handle_knowledge(self, query: str, service: str) -> Dict:
+        return await self.knowledge_agent.process_query(query)
+    
+    async def _handle_api(self, query: str, service: str) -> Dict:
+        return await self.api_agent.process_query(service, query)
+    
+    async def _handle_resolution(self, query: str, service: str) -> Dict:
+        # Generate resolution
+        resolution_result = await self.resolver.generate_resolution(query, service)
+        
+        if resolution_result["status"] != "success":
+            return resolution_result
+            
+        # Validate resolution
+        validation = self.validator.validate_resolution(resolution_result["resolution"])
+        
+        return {
+            "status": "success",
+            "type": "resolution",
+            "resolution": resolution_result["resolution"],
+            "validation": validation
+        }
+            
+    async def execute_resolution(self, resolution_data: Dict) -> Dict:
         """Execute an approved resolution plan"""
-        return self.executor.execute_remediation(resolution_data)
+        return await self.executor.execute_remediation(resolution_data)
         
+# Shared crew instance so agent state persists across requests
+@functools.cache
+def get_crew() -> SupportCrew:
+    """Return the shared SupportCrew, creating it on first use"""
+    return SupportCrew()
+
 # Replace the old general_query_handler with the new multi-agent system
 def general_query_handler(user_query: str) -> Dict:
     """Handle all user queries using the new multi-agent system"""
-    crew = SupportCrew()
-    return crew.process_request(user_query)
+    return run_on_loop(get_crew().process_request(user_query))
 
-def generate_commands_with_llm(user_query: str, server_name: str, server_info: Dict) -> str:
-    """Generate appropriate commands for a server using LLM based on query context"""
+# Captures the command from LLM output wrapped in optional ``` fences and a bash/sh tag
+_CMD_EXTRACT = re.compile(r'^[\s`]*(?:(?:bash|sh)[ \t]*\n)?(.*?)[\s`]*$', re.DOTALL)
+_NEWLINE_WS = re.compile(r'\s*\n\s*')
+
+# Upper bound on streamed chunks before command generation is cut off
+MAX_COMMAND_CHUNKS = 128
+
+def _stream_first_command(prompt_text: str) -> str:
+    """Stream the LLM output and stop decoding once the first command line is complete"""
+    buffer = ""
+    stream = _get_llm().stream(prompt_text)
     try:
-        os_type = server_info.get('os', 'linux')
-        services = server_info.get('services', [])
-        
-        prompt = PromptTemplate(
-            input_variables=["query", "server", "os", "services"],
-            template="""
+        for i, chunk in enumerate(stream):
+            buffer += chunk
+            # Only complete lines are considered; code fences and language tags are skipped
+            for line in buffer.split("\n")[:-1]:
+                stripped = line.strip()
+                if stripped and not stripped.startswith("```") and stripped not in ("bash", "sh"):
+                    return line
+            if i + 1 >= MAX_COMMAND_CHUNKS:
+                logger.warning("Command generation exceeded chunk limit, truncating output")
+                break
+    finally:
+        # Closing the generator closes the HTTP stream so Ollama stops decoding
+        stream.close()
+    return buffer
+
+COMMAND_PROMPT = """
             You are an expert IT administrator. Given the following information:
             
             Query: {query}
@@ -1175,45 +1364,29 @@ def generate_commands_with_llm(user_query: str, server_name: str, server_info: D
             
             Return ONLY the command with no explanations, no backticks, and no markdown formatting.
             """
-        )
+
+def generate_commands_with_llm(user_query: str, server_name: str, server_info: Dict) -> str:
+    """Generate appropriate commands for a server using LLM based on query context"""
+    try:
+        os_type = server_info.get('os', 'linux')
+        services = server_info.get('services', [])
         
-        # Generate command using LLM
-        chain = LLMChain(llm=llm, prompt=prompt)
-        generated_command = chain.run(
+        # Generate command using LLM, stopping as soon as one command line is complete
+        generated_command = _stream_first_command(COMMAND_PROMPT.format(
             query=user_query,
             server=server_name,
             os=os_type,
             services=", ".join(services)
-        ).strip()
+        )).strip()
         
-        logger.info(f"LLM generated command for {server_name}: {generated_command}")
+        logger.info("LLM generated command for %s: %s", server_name, generated_command)
         
-        # Remove any markdown formatting if present
-        if generated_command.startswith("```") and generated_command.endswith("```"):
-            # Extract content between first and last ```
-            lines = generated_command.split("\n")
-            if len(lines) > 2:
-                # Skip first line with ``` and language name
-                start_index = 1 if lines[0].startswith("```") else 0
-                # Skip last line with ```
-                end_index = -1 if lines[-1].strip() == "```" else None
-                # Join the content lines
-                generated_command = "\n".join(lines[start_index:end_index]).strip()
-            else:
-                generated_command = generated_command.strip("```").strip()
-        
-        # Remove any remaining backticks
-        generated_command = generated_command.strip("`").strip()
-        
-        # Remove any language specification at the beginning like "bash" or "sh"
-        if generated_command.startswith("bash") or generated_command.startswith("sh"):
-            generated_command = generated_command[4:].strip()
-            
-        # Replace multiple newlines with spaces to ensure single-line command
-        generated_command = re.sub(r'\s*\n\s*', ' ', generated_command)
+        # Strip optional code fences / language tag and collapse to a single line
+        match = _CMD_EXTRACT.match(generated_command)
+        generated_command = _NEWLINE_WS.sub(' ', match.group(1)).strip()
             
         return generated_command
     except Exception as e:
-        logger.error(f"Error generating command with LLM: {str(e)}", exc_info=True)
+        logger.error("Error generating command with LLM: %s", e, exc_info=True)
         # Fallback to a basic status command
         return "uptime" 
\ No newline at end of file
@@ -1,14 +1,16 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Request
+import msgspec
 from typing import Dict, List
+from api.codec import MsgspecJSONResponse, decode_body
 from core.anomaly import analyze_server_metrics
 
 router = APIRouter()
 
-class MetricsRequest(BaseModel):
+class MetricsRequest(msgspec.Struct):
     server_metrics: Dict[str, List[float]]
 
-@router.post("/anomaly-report")
-def anomaly_report(req: MetricsRequest):
+@router.post("/anomaly-report", response_class=MsgspecJSONResponse)
+async def anomaly_report(request: Request):
+    req = await decode_body(request, MetricsRequest)
     anomalies = analyze_server_metrics(req.server_metrics)
-    return {"anomalies": anomalies} 
\ No newline at end of file
+    return MsgspecJSONResponse({"anomalies": anomalies})
@@ -0,0 +1,18 @@
+import msgspec
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+class MsgspecJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return msgspec.json.encode(content)
+
+# Decode the raw request body straight into a typed Struct, skipping the intermediate dict
+async def decode_body(request: Request, type_):
+    try:
+        return msgspec.json.decode(await request.body(), type=type_)
+    except msgspec.ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
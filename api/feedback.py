@@ -1,16 +1,18 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Request
+import msgspec
+from api.codec import MsgspecJSONResponse, decode_body
 from core.feedback import submit_feedback
 
 router = APIRouter()
 
-class FeedbackRequest(BaseModel):
+class FeedbackRequest(msgspec.Struct):
     user: str
     query: str
     rating: int
     comments: str = ""
 
-@router.post("/feedback")
-def feedback(req: FeedbackRequest):
+@router.post("/feedback", response_class=MsgspecJSONResponse)
+async def feedback(request: Request):
+    req = await decode_body(request, FeedbackRequest)
     submit_feedback(req.user, req.query, req.rating, req.comments)
-    return {"status": "ok"} 
\ No newline at end of file
+    return MsgspecJSONResponse({"status": "ok"})
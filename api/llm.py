@@ -1,23 +1,26 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Request
+import msgspec
+from api.codec import MsgspecJSONResponse, decode_body
 from core.llm import knowledge_query, generate_remediation
 
 router = APIRouter()
 
-class KnowledgeRequest(BaseModel):
+class KnowledgeRequest(msgspec.Struct):
     question: str
 
-class RemediationRequest(BaseModel):
+class RemediationRequest(msgspec.Struct):
     issue: str
     service: str
     server: str
 
-@router.post("/knowledge-query")
-async def knowledge(req: KnowledgeRequest):
+@router.post("/knowledge-query", response_class=MsgspecJSONResponse)
+async def knowledge(request: Request):
+    req = await decode_body(request, KnowledgeRequest)
     answer = await knowledge_query(req.question)
-    return {"answer": answer}
+    return MsgspecJSONResponse({"answer": answer})
 
-@router.post("/remediation")
-async def remediation(req: RemediationRequest):
+@router.post("/remediation", response_class=MsgspecJSONResponse)
+async def remediation(request: Request):
+    req = await decode_body(request, RemediationRequest)
     plan = await generate_remediation(req.issue, req.service, req.server)
-    return {"remediation_plan": plan} 
\ No newline at end of file
+    return MsgspecJSONResponse({"remediation_plan": plan})
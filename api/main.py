@@ -6,9 +6,26 @@ from core.rbac import require_permission
 from api.feedback import router as feedback_router
 from api.llm import router as llm_router
 from api.anomaly import router as anomaly_router
+from core.llm import WARMUP_PROMPTS
+from core.llm_batcher import batcher
+from core.plugin import load_plugins
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def warm_llm():
+    # Load the model and prefill static prompt prefixes before the first user request
+    app.state.llm_keepalive = asyncio.create_task(batcher.keep_warm(WARMUP_PROMPTS))
+
+@app.on_event("startup")
+async def startup_plugins():
+    await asyncio.to_thread(load_plugins)
+
+@app.on_event("shutdown")
+async def stop_llm_keepalive():
+    app.state.llm_keepalive.cancel()
+    await batcher.aclose()
+
 class CommandRequest(BaseModel):
     command: str
     timeout: int = 30
@@ -1,8 +1,21 @@
-from flask import Flask, render_template, request, jsonify
+# Cooperative sockets let one worker hold many in-flight LLM/agent calls; must run before other imports
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    pass
+
+from flask import Flask, Response, render_template, stream_template, stream_with_context, request
+from flask.json.provider import JSONProvider
 import logging
 from datetime import datetime
-from orchestrator import SupportCrew
-import json
+from decimal import Decimal
+from agents import classify_issue
+from orchestrator import get_support_crew
+from core.plugin import load_plugins
+import orjson
+import os
+from typing import Dict
 
 # Configure logging
 logging.basicConfig(
@@ -15,154 +28,284 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _orjson_default(o):
+    # Types Flask's default provider handles that orjson does not
+    if isinstance(o, Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def orjson_response(data, status: int = 200) -> Response:
+    """Build a JSON response directly from orjson's bytes"""
+    return Response(
+        orjson.dumps(data, default=_orjson_default, option=ORJSON_OPTIONS),
+        status=status,
+        mimetype='application/json'
+    )
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, for Flask's own JSON handling and request.get_json"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        return orjson_response(self._prepare_response_obj(args, kwargs))
+
+DEBUG = os.environ.get('FLASK_DEBUG', 'false').lower() in ('true', '1', 'yes')
+
 app = Flask(__name__)
-support_crew = SupportCrew()
+app.json = OrjsonProvider(app)
+# Outside debug, templates never change under a running worker: skip the per-render stat
+app.config['TEMPLATES_AUTO_RELOAD'] = DEBUG
+app.jinja_env.auto_reload = DEBUG
+# Compile templates once at import so the first requests (and forked workers) reuse them
+for _template in ('index.html', 'error.html', 'confirm.html'):
+    app.jinja_env.get_template(_template)
+support_crew = get_support_crew()
+load_plugins()
+
+# Fields the dashboard history table needs; full tickets are fetched on demand
+TICKET_SUMMARY_FIELDS = ("id", "timestamp", "issue", "category", "status")
+# Keep embedded JSON from closing the <script> element or forming HTML entities
+_SCRIPT_SAFE = str.maketrans({'<': '\\u003c', '>': '\\u003e', '&': '\\u0026'})
+
+def tickets_json_for_html(tickets) -> str:
+    """Serialize ticket summaries for embedding in a <script type="application/json"> block"""
+    summaries = [{field: ticket.get(field) for field in TICKET_SUMMARY_FIELDS} for ticket in tickets]
+    return orjson.dumps(summaries).decode().translate(_SCRIPT_SAFE)
 
 @app.route('/')
 def index():
     """Render the main dashboard"""
     try:
         tickets = support_crew.get_ticket_log()
-        return render_template(
+        # The history table is rendered client-side from the embedded JSON
+        return app.response_class(stream_template(
             'index.html',
-            ticket_log=tickets
-        )
+            tickets_json=tickets_json_for_html(tickets)
+        ))
     except Exception as e:
-        logger.error(f"Error rendering index: {str(e)}", exc_info=True)
+        logger.error("Error rendering index: %s", e, exc_info=True)
         return render_template('error.html', error=str(e))
 
+def _format_knowledge_query(result: Dict, issue_description: str) -> Dict:
+    results = result.get('results', {})
+    summary = results.get('summary', 'No answer available')
+    # Format summary for HTML display if from knowledge base or LLM (preserve line breaks)
+    source = results.get('source', 'web search')
+    if source in ('built-in knowledge base', 'llm_knowledge'):
+        summary = summary.replace('\n', '<br>')
+    
+    return {'data': {
+        'summary': summary,
+        'related_topics': results.get('related_topics', []),
+        'query': result.get('query', issue_description),
+        'source': source
+    }}
+
+def _format_api_query(result: Dict, issue_description: str) -> Dict:
+    return {
+        'service': result.get('service', ''),
+        'data': result.get('data', {})
+    }
+
+def _format_infrastructure_query(result: Dict, issue_description: str) -> Dict:
+    # Extract command results for better formatting
+    infrastructure_data = []
+    for server_name, server_info in result.get('results', {}).items():
+        server_data = {
+            'server': server_name,
+            'ip': server_info.get('ip', 'Unknown'),
+            'services': server_info.get('services', []),
+            'status': 'error',
+            'output': 'No output available'
+        }
+        
+        # Process command outputs
+        commands = server_info.get('commands', [])
+        if commands:
+            cmd_result = commands[0]  # Usually just one command per query
+            server_data['status'] = 'success' if cmd_result.get('success', False) else 'error'
+            server_data['output'] = cmd_result.get('output', 'No output available')
+        
+        infrastructure_data.append(server_data)
+        
+    return {
+        'results': result.get('results', {}),
+        'data': infrastructure_data,
+        'service': result.get('service', '')
+    }
+
+def _format_resolution(result: Dict, issue_description: str) -> Dict:
+    resolution_data = result.get('resolution', {})
+    validation_data = result.get('validation', {})
+    
+    return {'data': {
+        'resolution': resolution_data,
+        'validation': validation_data,
+        'approved': validation_data.get('approved', False),
+        'confidence': validation_data.get('confidence', 0.0),
+        'risks': validation_data.get('risks_identified', []),
+        'suggestions': validation_data.get('suggested_modifications', [])
+    }}
+
+# Result type -> fields added to the /submit_issue response
+_RESULT_FORMATTERS = {
+    'knowledge_query': _format_knowledge_query,
+    'api_query': _format_api_query,
+    'infrastructure_query': _format_infrastructure_query,
+    'resolution': _format_resolution,
+}
+
+def _issue_description_from_request():
+    # Programmatic callers send JSON; the dashboard form is urlencoded
+    if request.is_json:
+        # Malformed JSON, or JSON that is not an object, is treated like a missing description (400)
+        try:
+            payload = orjson.loads(request.get_data())
+        except orjson.JSONDecodeError:
+            return None
+        return payload.get('issue_description') if isinstance(payload, dict) else None
+    return request.form.get('issue_description')
+
+def _issue_response(result: Dict, issue_description: str) -> Dict:
+    """Build the /submit_issue payload for a processed issue"""
+    # Serializing the whole result is only worth it when someone reads it
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received result from support_crew: %s", orjson.dumps(result, default=str).decode())
+
+    response = {
+        'status': result.get('status', 'error'),
+        'type': result.get('type', 'unknown'),
+        'ticket_log': support_crew.get_ticket_log()
+    }
+    
+    # Add type-specific data
+    formatter = _RESULT_FORMATTERS.get(response['type'])
+    if formatter:
+        response.update(formatter(result, issue_description))
+    return response
+
 @app.route('/submit_issue', methods=['POST'])
 def submit_issue():
     """Handle issue submission"""
     try:
-        issue_description = request.form.get('issue_description')
+        issue_description = _issue_description_from_request()
         if not issue_description:
-            return jsonify({
+            return orjson_response({
                 'status': 'error',
                 'message': 'No issue description provided'
-            }), 400
+            }, 400)
 
         # Process the issue
         result = support_crew.process_issue(issue_description)
-        logger.info(f"Received result from support_crew: {result}")
-
-        # Prepare response
-        response = {
-            'status': result.get('status', 'error'),
-            'type': result.get('type', 'unknown'),
-            'ticket_log': support_crew.get_ticket_log()
-        }
-        
-        # Add type-specific data
-        if result.get('type') == 'knowledge_query':
-            summary = result.get('results', {}).get('summary', 'No answer available')
-            # Format summary for HTML display if from knowledge base or LLM (preserve line breaks)
-            source = result.get('results', {}).get('source', 'web search')
-            if source in ['built-in knowledge base', 'llm_knowledge']:
-                summary = summary.replace('\n', '<br>')
-            
-            response['data'] = {
-                'summary': summary,
-                'related_topics': result.get('results', {}).get('related_topics', []),
-                'query': result.get('query', issue_description),
-                'source': source
-            }
-        elif result.get('type') == 'api_query':
-            response.update({
-                'service': result.get('service', ''),
-                'data': result.get('data', {})
-            })
-        elif result.get('type') == 'infrastructure_query':
-            # Extract command results for better formatting
-            infrastructure_data = []
-            for server_name, server_info in result.get('results', {}).items():
-                server_data = {
-                    'server': server_name,
-                    'ip': server_info.get('ip', 'Unknown'),
-                    'services': server_info.get('services', []),
-                    'status': 'error',
-                    'output': 'No output available'
-                }
-                
-                # Process command outputs
-                commands = server_info.get('commands', [])
-                if commands:
-                    cmd_result = commands[0]  # Usually just one command per query
-                    server_data['status'] = 'success' if cmd_result.get('success', False) else 'error'
-                    server_data['output'] = cmd_result.get('output', 'No output available')
-                
-                infrastructure_data.append(server_data)
-                
-            response.update({
-                'results': result.get('results', {}),
-                'data': infrastructure_data,
-                'service': result.get('service', '')
-            })
-        elif result.get('type') == 'resolution':
-            resolution_data = result.get('resolution', {})
-            validation_data = result.get('validation', {})
-            
-            response['data'] = {
-                'resolution': resolution_data,
-                'validation': validation_data,
-                'approved': validation_data.get('approved', False),
-                'confidence': validation_data.get('confidence', 0.0),
-                'risks': validation_data.get('risks_identified', []),
-                'suggestions': validation_data.get('suggested_modifications', [])
-            }
-
-        return jsonify(response)
+        return orjson_response(_issue_response(result, issue_description))
 
     except Exception as e:
-        logger.error(f"Error processing issue: {str(e)}", exc_info=True)
-        return jsonify({
+        logger.error("Error processing issue: %s", e, exc_info=True)
+        return orjson_response({
             'status': 'error',
             'message': str(e)
-        }), 500
+        }, 500)
+
+def _sse(event: str, data) -> bytes:
+    return b'event: ' + event.encode() + b'\ndata: ' + orjson.dumps(data, default=_orjson_default, option=ORJSON_OPTIONS) + b'\n\n'
+
+@app.route('/submit_issue/stream', methods=['POST'])
+def submit_issue_stream():
+    """Handle issue submission, reporting progress as Server-Sent Events"""
+    try:
+        issue_description = _issue_description_from_request()
+    except Exception as e:
+        logger.error("Error reading issue submission: %s", e, exc_info=True)
+        issue_description = None
+    if not issue_description:
+        return orjson_response({
+            'status': 'error',
+            'message': 'No issue description provided'
+        }, 400)
+
+    def events():
+        try:
+            # Classification is local and cached, so the client learns the route before the agents run
+            category, service, _ = classify_issue(issue_description)
+            yield _sse('classified', {'category': category, 'service': service})
+            result = support_crew.process_issue(issue_description)
+            yield _sse('result', _issue_response(result, issue_description))
+        except Exception as e:
+            logger.error("Error processing issue: %s", e, exc_info=True)
+            yield _sse('error', {'status': 'error', 'message': str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/approve_execution', methods=['POST'])
 def approve_execution():
     """Handle execution approval"""
     try:
-        ticket_id = request.form.get('ticket_id')
-        execution_data = json.loads(request.form.get('execution_data'))
+        try:
+            if request.is_json:
+                body = orjson.loads(request.get_data())
+                if not isinstance(body, dict):
+                    body = {}
+                ticket_id = body.get('ticket_id')
+                execution_data = body.get('execution_data')
+            else:
+                ticket_id = request.form.get('ticket_id')
+                execution_data = orjson.loads(request.form.get('execution_data') or 'null')
+        except orjson.JSONDecodeError:
+            return orjson_response({
+                'status': 'error',
+                'message': 'Malformed JSON in request'
+            }, 400)
         
         if not ticket_id or not execution_data:
-            return jsonify({
+            return orjson_response({
                 'status': 'error',
                 'message': 'Missing ticket ID or execution data'
-            }), 400
+            }, 400)
 
         # Execute the approved steps
         result = support_crew.execute_remediation(ticket_id, execution_data)
         
-        return jsonify({
+        return orjson_response({
             'status': 'success',
             'data': result
         })
 
     except Exception as e:
-        logger.error(f"Error during execution: {str(e)}", exc_info=True)
-        return jsonify({
+        logger.error("Error during execution: %s", e, exc_info=True)
+        return orjson_response({
             'status': 'error',
             'message': f'Execution error: {str(e)}'
-        }), 500
+        }, 500)
 
 @app.route('/ticket_log')
 def ticket_log():
     """Get the ticket history"""
     try:
         tickets = support_crew.get_ticket_log()
-        return jsonify({
+        return orjson_response({
             'status': 'success',
             'tickets': tickets
         })
     except Exception as e:
-        logger.error(f"Error fetching ticket log: {str(e)}", exc_info=True)
-        return jsonify({
+        logger.error("Error fetching ticket log: %s", e, exc_info=True)
+        return orjson_response({
             'status': 'error',
             'message': f'Error fetching ticket log: {str(e)}'
-        }), 500
+        }, 500)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=DEBUG, host='0.0.0.0', port=5000)
@@ -0,0 +1,61 @@
+"""Embed the YAML/JSON configs as Python literals in core/_generated_config.py.
+
+Run from the repository root after changing any of the files in CONFIG_SOURCES:
+
+    python build_config.py
+
+At import, core.embedded_config serves these values instead of parsing the files,
+as long as each source's mtime still matches; otherwise the file is parsed at runtime.
+"""
+import os
+import pprint
+
+import orjson
+import yaml
+
+# Constant name -> source file, relative to the repository root (the working directory the app runs from)
+CONFIG_SOURCES = {
+    'RBAC': 'config/rbac.yaml',
+    'CMD_CFG': 'config/commands.yaml',
+    'INFRA': 'infra_config.json',
+}
+
+OUTPUT = os.path.join('core', '_generated_config.py')
+
+
+def load_source(path: str):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.json'):
+        # Same shape core.command builds at runtime
+        return {'servers': orjson.loads(data)}
+    return yaml.safe_load(data)
+
+
+def main():
+    sources = {}
+    constants = {}
+    for name, path in CONFIG_SOURCES.items():
+        if os.path.exists(path):
+            sources[path] = os.stat(path).st_mtime_ns
+            constants[name] = load_source(path)
+        else:
+            # Recorded as absent so creating the file later invalidates the embedded value
+            sources[path] = None
+            constants[name] = None
+
+    lines = [
+        '# Generated by build_config.py; do not edit.',
+        '',
+        f'SOURCES = {pprint.pformat(sources)}',
+        '',
+    ]
+    for name, value in constants.items():
+        lines += [f'{name} = {pprint.pformat(value, sort_dicts=False)}', '']
+    with open(OUTPUT, 'w') as f:
+        f.write('\n'.join(lines))
+    print(f"Wrote {OUTPUT} from {len([p for p in sources.values() if p is not None])} config files")
+
+
+if __name__ == '__main__':
+    main()
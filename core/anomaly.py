@@ -1,23 +1,86 @@
-import statistics
+import numpy as np
 from typing import List, Dict
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy implementation is used instead
+    njit = None
+
+def _anomaly_mask_numpy(a: np.ndarray, threshold: float) -> np.ndarray:
+    stdev = a.std(ddof=1)
+    if stdev == 0:
+        return np.zeros(a.shape[0], dtype=np.bool_)
+    return np.abs((a - a.mean()) / stdev) > threshold
+
+def _anomaly_mask_2d_numpy(series: np.ndarray, threshold: float) -> np.ndarray:
+    """Z-score every row of an (n_metrics, n_samples) array in one pass"""
+    means = series.mean(axis=1, keepdims=True)
+    stdevs = series.std(axis=1, ddof=1, keepdims=True)
+    # Constant rows have no anomalies; avoid dividing by zero for them
+    flat = stdevs == 0
+    z = np.abs(series - means) / np.where(flat, 1.0, stdevs)
+    return (z > threshold) & ~flat
+
+if njit is not None:
+    # Fused mean/stdev/z-score loops: no temporaries, which dominate on short windows
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _anomaly_mask(a, threshold):
+        n = a.shape[0]
+        mask = np.zeros(n, dtype=np.bool_)
+        s = 0.0
+        for i in range(n):
+            s += a[i]
+        mean = s / n
+        v = 0.0
+        for i in range(n):
+            d = a[i] - mean
+            v += d * d
+        stdev = (v / (n - 1)) ** 0.5
+        if stdev == 0:
+            return mask
+        for i in range(n):
+            mask[i] = abs(a[i] - mean) / stdev > threshold
+        return mask
+
+    # Rows are scored serially: this runs on request threads, where numba's parallel threading
+    # layers either deadlock (tbb, first call off the main thread) or abort on concurrent use (workqueue)
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _anomaly_mask_2d(series, threshold):
+        mask = np.zeros(series.shape, dtype=np.bool_)
+        for row in range(series.shape[0]):
+            mask[row] = _anomaly_mask(series[row], threshold)
+        return mask
+else:
+    _anomaly_mask = _anomaly_mask_numpy
+    _anomaly_mask_2d = _anomaly_mask_2d_numpy
+
 # Example: Detect if a metric is an outlier (z-score > threshold)
 def detect_anomalies(metrics: List[float], threshold: float = 2.5) -> List[int]:
     if len(metrics) < 2:
         return []
-    mean = statistics.mean(metrics)
-    stdev = statistics.stdev(metrics)
-    if stdev == 0:
-        return []
-    anomalies = [i for i, x in enumerate(metrics) if abs((x - mean) / stdev) > threshold]
-    return anomalies
+    a = np.asarray(metrics, dtype=np.float64)
+    return np.flatnonzero(_anomaly_mask(a, threshold)).tolist()
 
 # Example: Analyze a batch of server metrics
-def analyze_server_metrics(server_metrics: Dict[str, List[float]]) -> Dict[str, List[int]]:
+def analyze_server_metrics(server_metrics: Dict[str, List[float]], threshold: float = 2.5) -> Dict[str, List[int]]:
     # server_metrics: {"cpu": [...], "mem": [...], ...}
-    return {metric: detect_anomalies(values) for metric, values in server_metrics.items()}
+    # Series of equal length are stacked into one (n_metrics, n_samples) array and scored together
+    by_length: Dict[int, List[str]] = {}
+    for metric, values in server_metrics.items():
+        by_length.setdefault(len(values), []).append(metric)
+
+    anomalies = {}
+    for length, metrics in by_length.items():
+        if length < 2:
+            anomalies.update((metric, []) for metric in metrics)
+            continue
+        series = np.asarray([server_metrics[metric] for metric in metrics], dtype=np.float64)
+        mask = _anomaly_mask_2d(series, threshold)
+        anomalies.update((metric, np.flatnonzero(row).tolist()) for metric, row in zip(metrics, mask))
+    # Report metrics in the order they were given
+    return {metric: anomalies[metric] for metric in server_metrics}
 
 # Hook for ML-based anomaly detection (to be extended)
 def ml_detect_anomalies(metrics: List[float]) -> List[int]:
     # Placeholder for ML model
-    return [] 
\ No newline at end of file
+    return []
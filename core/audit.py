@@ -0,0 +1,140 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+AUDIT_LOG_FILE = 'logs/audit.log'
+LOG_FORMAT = '%(asctime)s.%(msecs)03d | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d - %(message)s'
+
+# Records waiting for the flusher; when full, new records are dropped and counted instead of blocking the caller
+AUDIT_QUEUE_SIZE = 10_000
+# Records are written in batches of up to this many, at most this long after arrival
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 0.1
+# How long exit waits for queued audit records to be written
+AUDIT_DRAIN_TIMEOUT = 5
+
+# Console and audit log file (rotated weekly, a month kept); only ever written from background threads
+_formatter = logging.Formatter(LOG_FORMAT, '%Y-%m-%d %H:%M:%S')
+os.makedirs(os.path.dirname(AUDIT_LOG_FILE), exist_ok=True)
+_HANDLERS = (
+    TimedRotatingFileHandler(AUDIT_LOG_FILE, when='D', interval=7, backupCount=4, delay=True),
+    logging.StreamHandler(),
+)
+for _handler in _HANDLERS:
+    _handler.setFormatter(_formatter)
+
+_log_q = queue.Queue()
+_listener = QueueListener(_log_q, *_HANDLERS)
+_listener.start()
+# Handlers feeding _log_q, repointed when a forked child gets its own queue
+_queue_handlers = []
+
+def queued_logger(name: str) -> logging.Logger:
+    """Logger whose records are written to the console and audit log by a background thread"""
+    log = logging.getLogger(name)
+    if not any(isinstance(h, QueueHandler) for h in log.handlers):
+        handler = QueueHandler(_log_q)
+        _queue_handlers.append(handler)
+        log.addHandler(handler)
+        # Not also through the root logger's handlers, which write on the calling thread
+        log.propagate = False
+    return log
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive fork (gunicorn --preload imports this in the master);
+    # give the child a fresh queue, since the parent's may have been locked mid-operation, and drain it
+    global _log_q, _listener
+    _log_q = queue.Queue()
+    for handler in _queue_handlers:
+        handler.queue = _log_q
+    _listener = QueueListener(_log_q, *_HANDLERS)
+    _listener.start()
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+def _stop_listener():
+    _listener.stop()
+
+logger = queued_logger(__name__)
+
+_audit_q = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_audit_lock = threading.Lock()
+_audit_thread = None
+_dropped = 0
+_reported_dropped = 0
+
+def _flusher():
+    global _reported_dropped
+    while True:
+        batch = [_audit_q.get()]
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_audit_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        for record in batch:
+            for handler in _HANDLERS:
+                handler.handle(record)
+        dropped = _dropped
+        if dropped != _reported_dropped:
+            logger.warning("Audit queue full, dropped %s records (%s total)", dropped - _reported_dropped, dropped)
+            _reported_dropped = dropped
+        for _ in batch:
+            _audit_q.task_done()
+
+def audit(message: str):
+    """Queue an audit record for the audit log without blocking on the sink"""
+    global _audit_thread, _dropped
+    # Threads do not survive fork; (re)start the flusher in this process if needed
+    if _audit_thread is None or not _audit_thread.is_alive():
+        with _audit_lock:
+            if _audit_thread is None or not _audit_thread.is_alive():
+                _audit_thread = threading.Thread(target=_flusher, name='audit-flusher', daemon=True)
+                _audit_thread.start()
+    # Built now so it carries the caller and the time the action happened, not the time it was flushed
+    caller = sys._getframe(1)
+    record = logger.makeRecord(caller.f_globals.get('__name__', logger.name), logging.INFO, caller.f_code.co_filename,
+                               caller.f_lineno, message, None, None, caller.f_code.co_name)
+    try:
+        _audit_q.put_nowait(record)
+    except queue.Full:
+        _dropped += 1
+
+def dropped_audit_records() -> int:
+    """Number of audit records dropped because the queue was full"""
+    return _dropped
+
+def _reset_audit_after_fork():
+    # The parent's queue may have been locked mid-operation and holds records the parent will write;
+    # the child starts empty and starts its own flusher on its first audit() call
+    global _audit_q, _audit_lock, _audit_thread, _dropped, _reported_dropped
+    _audit_q = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+    _audit_lock = threading.Lock()
+    _audit_thread = None
+    _dropped = 0
+    _reported_dropped = 0
+
+os.register_at_fork(after_in_child=_reset_audit_after_fork)
+
+def _drain_audit_queue():
+    """Wait, up to AUDIT_DRAIN_TIMEOUT, for the flusher to write out queued audit records"""
+    deadline = time.monotonic() + AUDIT_DRAIN_TIMEOUT
+    with _audit_q.all_tasks_done:
+        while _audit_q.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _audit_q.all_tasks_done.wait(remaining)
+
+# On exit, write out queued audit records, then whatever is left in the log queue
+atexit.register(_stop_listener)
+atexit.register(_drain_audit_queue)
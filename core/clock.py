@@ -0,0 +1,18 @@
+import datetime
+import time
+
+# Timestamps produced within the same millisecond share one formatted string
+_CLOCK_RESOLUTION_NS = 1_000_000
+
+_cached = (-1, '')
+
+def iso_now() -> str:
+    """Current UTC time as an ISO 8601 string, formatted at most once per millisecond"""
+    global _cached
+    now_ns = time.time_ns()
+    tick, iso = _cached
+    if now_ns // _CLOCK_RESOLUTION_NS != tick:
+        iso = datetime.datetime.fromtimestamp(now_ns / 1e9, tz=datetime.timezone.utc).isoformat()
+        # A single tuple assignment, so concurrent callers never see a tick paired with another tick's string
+        _cached = (now_ns // _CLOCK_RESOLUTION_NS, iso)
+    return iso
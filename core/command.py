@@ -2,19 +2,46 @@ import subprocess
 import asyncio
 import logging
 import os
-import yaml
-import json
-from loguru import logger
+import re
+import threading
+import functools
+import itertools
+import shlex
+import orjson
 from core.security import is_command_safe, sanitize_input
-from core.remote import run_ssh_command
-from core.command_map import get_command
+from core.remote import asyncssh, run_ssh_command, run_ssh_command_async
+from core.command_map import COMMANDS, get_command, resolve_os
+from core.embedded_config import embedded_config
+from core.audit import audit, queued_logger
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
-log = logging.getLogger(__name__)
+# Also written to the audit log; the console and file writes happen on a background thread
+logger = queued_logger(__name__)
 
-# Audit log setup
-logger.add('logs/audit.log', rotation='1 week', retention='1 month')
+# Concurrent SSH commands per process, kept below sshd's MaxStartups
+SSH_CONCURRENCY = int(os.environ.get('SSH_CONCURRENCY', '8'))
+# A thread semaphore rather than an asyncio one: it is acquired in the worker threads running paramiko,
+# which may have been dispatched from the shared loop or from the FastAPI app's loop
+_SSH_SEM = threading.BoundedSemaphore(SSH_CONCURRENCY)
+
+# Local commands: attempts to spawn the process, with exponential backoff between them (seconds)
+LOCAL_SPAWN_ATTEMPTS = 3
+LOCAL_SPAWN_BACKOFF = 0.05
+LOCAL_SPAWN_BACKOFF_MAX = 0.4
+
+# Characters that need a shell to interpret (pipes, chaining, redirection, quoting, globs, ...)
+_SHELL_SYNTAX = re.compile(r'[|&;<>()$`\\"\'*?\[\]{}~#\n]')
+# Commands from the command map that are plain argv lists
+_STATIC_ARGV = {
+    cmd: shlex.split(cmd)
+    for cmd in itertools.chain.from_iterable(metrics.values() for metrics in COMMANDS.values())
+    if not _SHELL_SYNTAX.search(cmd)
+}
+
+def _run_ssh_limited(*args) -> tuple:
+    with _SSH_SEM:
+        return run_ssh_command(*args)
 
 # Default infra config
 DEFAULT_INFRA = {
@@ -28,38 +55,80 @@ DEFAULT_INFRA = {
     }
 }
 
+@functools.lru_cache(maxsize=8)
+def _load_infra(path: str, mtime_ns: int) -> dict:
+    """Parse an infra config file; keyed on mtime so an unchanged file is only parsed once"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith('.json'):
+        return {'servers': orjson.loads(data)}  # Add a 'servers' key to maintain compatibility
+    # Only the legacy YAML config needs PyYAML; imported here to keep it off the startup path
+    import yaml
+    # libyaml's C parser when available
+    return yaml.load(data, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+def load_infra(path: str) -> dict:
+    """Return the parsed infra config at path (shared, do not mutate)"""
+    return _load_infra(path, os.stat(path).st_mtime_ns)
+
 # Load infra config
 try:
     infra_path = 'infra_config.json'  # Change to use the actual JSON file now
     if os.path.exists(infra_path):
-        with open(infra_path) as f:
-            INFRA = {'servers': json.load(f)}  # Add a 'servers' key to maintain compatibility
-            logger.info(f"Loaded infra config from {infra_path} with {len(INFRA['servers'])} servers")
+        # Prefer the copy embedded by build_config.py; it is only used while the file is unchanged
+        INFRA = embedded_config('INFRA', infra_path) or load_infra(infra_path)
+        logger.info("Loaded infra config from %s with %s servers", infra_path, len(INFRA['servers']))
     else:
-        logger.warning(f"Infra config not found at {infra_path}, trying legacy path")
+        logger.warning("Infra config not found at %s, trying legacy path", infra_path)
         infra_path = 'config/infra.yaml'
         if os.path.exists(infra_path):
-            with open(infra_path) as f:
-                INFRA = yaml.safe_load(f)
-                logger.info(f"Loaded legacy infra config from {infra_path}")
+            INFRA = load_infra(infra_path)
+            logger.info("Loaded legacy infra config from %s", infra_path)
         else:
-            logger.warning(f"No infra config found, using defaults")
+            logger.warning("No infra config found, using defaults")
             INFRA = DEFAULT_INFRA
 except Exception as e:
-    logger.error(f"Error loading infra config: {str(e)}")
+    logger.error("Error loading infra config: %s", e)
     INFRA = DEFAULT_INFRA
 
+# "ping" or "ping6" plus optional arguments; the arguments decide how the server is filled in as target
+_PING_RE = re.compile(r'ping6?(?P<args>\s.*)?', re.DOTALL)
+
+def _rewrite_ping(cmd: str, server: str, ip: str) -> str:
+    """Point a ping command at the server when it has no target or targets localhost"""
+    m = _PING_RE.fullmatch(cmd)
+    if m is None:
+        return cmd
+    args = m.group('args')
+    if args is None:
+        # A bare ping6 is left alone: the configured addresses are IPv4
+        if cmd != 'ping':
+            return cmd
+        cmd = f"ping -c 4 {ip}"
+        logger.info("Added target to ping command: '%s'", cmd)
+    elif 'localhost' in args:
+        cmd = cmd.replace('localhost', server)
+        logger.info("Updated ping command to target server: '%s'", cmd)
+    # Parameters but no host (any hostname or address contains a dot)
+    elif '.' not in args:
+        cmd = f"{cmd} {ip}"
+        logger.info("Added target to ping command with params: '%s'", cmd)
+    return cmd
+
 async def run_command_async(cmd: str, timeout: int = 30, user: str = None, server: str = None, metric: str = None) -> dict:
     # Log initial parameters
-    logger.info(f"run_command_async called with: cmd='{cmd}', server={server}, metric={metric}")
+    logger.info("run_command_async called with: cmd='%s', server=%s, metric=%s", cmd, server, metric)
     
     # Type check for cmd
     if not isinstance(cmd, str):
-        logger.error(f"Invalid command type: {type(cmd)}, value: {cmd}")
+        logger.error("Invalid command type: %s, value: %s", type(cmd), cmd)
         return {"success": False, "output": "Internal error: command is not a string", "return_code": -1}
         
-    cmd = sanitize_input(cmd)
-    logger.info(f"After sanitize_input, cmd='{cmd}'")
+    # Only user-supplied commands are sanitized; the metric path below substitutes trusted
+    # commands from command_map, which are used as they are
+    if cmd:
+        cmd = sanitize_input(cmd)
+        logger.info("After sanitize_input, cmd='%s'", cmd)
     
     # Security checks are now disabled in is_command_safe function
     # if not is_command_safe(cmd):
@@ -76,7 +145,7 @@ async def run_command_async(cmd: str, timeout: int = 30, user: str = None, serve
     
     # If the provided server name is a canonical name, convert it to the legacy name used in config
     if server in legacy_server_mapping:
-        logger.info(f"Converting canonical server name '{server}' to legacy name '{legacy_server_mapping[server]}'")
+        logger.info("Converting canonical server name '%s' to legacy name '%s'", server, legacy_server_mapping[server])
         server = legacy_server_mapping[server]
     
     # If server is specified, use remote execution
@@ -87,40 +156,28 @@ async def run_command_async(cmd: str, timeout: int = 30, user: str = None, serve
         # If we have a metric but no command, get one based on the metric
         if metric and not cmd:
             try:
-                logger.info(f"Getting command for OS {os_type}, metric {metric}")
+                logger.info("Getting command for OS %s, metric %s", os_type, metric)
                 new_cmd = get_command(os_type, metric)
                 # Ensure the returned command is a string
                 if not isinstance(new_cmd, str):
-                    logger.error(f"get_command returned non-string: {type(new_cmd)}, value: {new_cmd}")
+                    logger.error("get_command returned non-string: %s, value: %s", type(new_cmd), new_cmd)
                     return {"success": False, "output": "Internal error: invalid command format", "return_code": -1}
                 if new_cmd:  # Only update if we got a valid command
                     cmd = new_cmd
-                    logger.info(f"Using metric-based command: '{cmd}'")
+                    logger.info("Using metric-based command: '%s'", cmd)
                 else:
-                    logger.warning(f"No command found for OS {os_type} and metric {metric}")
+                    logger.warning("No command found for OS %s and metric %s", os_type, metric)
                     # If metric is a service name, try a default service check command
                     if metric in ['nginx', 'tomcat', 'mysql', 'rabbitmq', 'memcache', 'memcached']:
                         cmd = f"systemctl status {metric}"
-                        logger.info(f"Using fallback service status command: '{cmd}'")
+                        logger.info("Using fallback service status command: '%s'", cmd)
             except Exception as e:
-                logger.error(f"Error in get_command: {str(e)}")
+                logger.error("Error in get_command: %s", e)
                 return {"success": False, "output": f"Error getting command: {str(e)}", "return_code": -1}
         
-        # Special case for network diagnostic commands that need a target
-        if cmd and cmd.startswith('ping') and 'localhost' in cmd and server:
-            # Replace localhost with the actual server target
-            cmd = cmd.replace('localhost', server)
-            logger.info(f"Updated ping command to target server: '{cmd}'")
-        # Handle case where user provided ping command with no target or with localhost
-        elif cmd and cmd == 'ping' and server:
-            # Add the server as the target
-            cmd = f"ping -c 4 {server_info['ip']}"
-            logger.info(f"Added target to ping command: '{cmd}'")
-        # Handle user-supplied ping command that might have parameters but no explicit host
-        elif cmd and cmd.startswith('ping') and ' ' in cmd and not any(part in cmd for part in ['.', 'localhost', '127.0.0.1']) and server:
-            # Add the server as the target
-            cmd = f"{cmd} {server_info['ip']}"
-            logger.info(f"Added target to ping command with params: '{cmd}'")
+        # Network diagnostic commands need the server as their target
+        if cmd:
+            cmd = _rewrite_ping(cmd, server, server_info['ip'])
                 
         # Check again that the command is safe after substituting with metric
         # Security checks are now disabled
@@ -129,26 +186,31 @@ async def run_command_async(cmd: str, timeout: int = 30, user: str = None, serve
         #     return {"success": False, "output": "Command not allowed after metric substitution.", "return_code": -1}
                 
         # Check if OS type is Linux or CentOS (which is also Linux-based)
-        if os_type.lower() == 'linux' or 'centos' in os_type.lower() or 'ubuntu' in os_type.lower():
+        if resolve_os(os_type):
             try:
                 if not cmd:
                     logger.warning("No command to execute after processing")
                     return {"success": False, "output": "No command specified or generated.", "return_code": -1}
                     
-                logger.info(f"Executing command on {server} ({server_info['ip']}): '{cmd}'")
-                ok, output = run_ssh_command(server_info['ip'], server_info['user'], server_info['password'], cmd, timeout, server)
-                logger.info(f"User {user} ran remotely on {server}: '{cmd}', success={ok}")
+                logger.info("Executing command on %s (%s): '%s'", server, server_info['ip'], cmd)
+                ssh_args = (server_info['ip'], server_info['user'], server_info['password'], cmd, timeout, server)
+                if asyncssh is not None:
+                    ok, output = await run_ssh_command_async(*ssh_args)
+                else:
+                    # Paramiko blocks; run it off the event loop so other servers' commands proceed
+                    ok, output = await asyncio.to_thread(_run_ssh_limited, *ssh_args)
+                audit(f"User {user} ran remotely on {server}: '{cmd}', success={ok}")
                 return {"success": ok, "output": output, "return_code": 0 if ok else 1}
             except Exception as e:
-                logger.error(f"SSH execution error: {str(e)}")
+                logger.error("SSH execution error: %s", e)
                 return {"success": False, "output": f"SSH error: {str(e)}", "return_code": -1}
         # For unsupported OS types
         else:
-            logger.warning(f"Unsupported OS type for remote execution: {os_type}")
+            logger.warning("Unsupported OS type for remote execution: %s", os_type)
             return {"success": False, "output": f"Unsupported OS type: {os_type}", "return_code": -1}
     
     # Log what we're doing
-    logger.info(f"No server specified or server not found, running local command: '{cmd}'")
+    logger.info("No server specified or server not found, running local command: '%s'", cmd)
     
     # Ensure we have a command to execute
     if not cmd:
@@ -156,25 +218,47 @@ async def run_command_async(cmd: str, timeout: int = 30, user: str = None, serve
         return {"success": False, "output": "No command specified for local execution.", "return_code": -1}
     
     # Fallback: local execution (for dev/testing)
-    for attempt in range(3):  # Retry logic
+    # Only a failed spawn (EAGAIN, ENOMEM, ...) is worth retrying; a command that ran and failed
+    # would fail the same way again
+    for attempt in range(LOCAL_SPAWN_ATTEMPTS):
         try:
-            proc = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            try:
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
-            except asyncio.TimeoutError:
-                proc.kill()
-                await proc.wait()
-                logger.error(f"Command timed out: '{cmd}'")
-                return {"success": False, "output": "Timeout", "return_code": -1}
-            rc = proc.returncode
-            output = stdout.decode() + (stderr.decode() if rc != 0 else '')
-            logger.info(f"User {user} ran locally: '{cmd}' (rc={rc})")
-            return {"success": rc == 0, "output": output.strip(), "return_code": rc}
-        except Exception as e:
-            logger.error(f"Error running command (attempt {attempt+1}): '{cmd}' - {e}")
-            await asyncio.sleep(1)
-    return {"success": False, "output": "Failed after retries", "return_code": -1} 
\ No newline at end of file
+            argv = _STATIC_ARGV.get(cmd)
+            if argv is not None:
+                # Known command without shell syntax: exec it directly, no /bin/sh in between
+                proc = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            else:
+                proc = await asyncio.create_subprocess_shell(
+                    cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            break
+        except FileNotFoundError as e:
+            # What the shell would have reported for a missing program
+            audit(f"User {user} ran locally: '{cmd}' (rc=127)")
+            return {"success": False, "output": f"{e.filename or cmd}: not found", "return_code": 127}
+        except OSError as e:
+            logger.error("Error starting command (attempt %s): '%s' - %s", attempt+1, cmd, e)
+            if attempt + 1 < LOCAL_SPAWN_ATTEMPTS:
+                await asyncio.sleep(min(LOCAL_SPAWN_BACKOFF * 2 ** attempt, LOCAL_SPAWN_BACKOFF_MAX))
+    else:
+        return {"success": False, "output": "Failed after retries", "return_code": -1}
+    try:
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logger.error("Command timed out: '%s'", cmd)
+            return {"success": False, "output": "Timeout", "return_code": -1}
+        rc = proc.returncode
+        output = stdout.decode() + (stderr.decode() if rc != 0 else '')
+        audit(f"User {user} ran locally: '{cmd}' (rc={rc})")
+        return {"success": rc == 0, "output": output.strip(), "return_code": rc}
+    except Exception as e:
+        logger.error("Error running command: '%s' - %s", cmd, e)
+        return {"success": False, "output": f"Error running command: {str(e)}", "return_code": -1}
@@ -1,3 +1,5 @@
+import functools
+
 COMMANDS = {
     'linux': {
         'cpu': 'top -b -n1 | grep "Cpu(s)"',
@@ -64,5 +66,31 @@ COMMANDS = {
     }
 }
 
+# (os, metric) -> command, so a lookup is a single hash probe
+_FLAT = {(os_name, metric): cmd for os_name, metrics in COMMANDS.items() for metric, cmd in metrics.items()}
+
+# OS names and families mapped to the COMMANDS key that serves them
+_OS_ALIAS = {
+    'linux': 'linux',
+    'centos': 'centos/stream9',
+    'centos/stream9': 'centos/stream9',
+    'ubuntu': 'ubuntu/jammy64',
+    'ubuntu/jammy64': 'ubuntu/jammy64',
+}
+
+_OS_FAMILIES = ('linux', 'centos', 'ubuntu')
+
+@functools.lru_cache(maxsize=None)
+def resolve_os(os_type: str) -> str:
+    """Normalize an infra config OS name (e.g. 'CentOS/Stream9') to a COMMANDS key, or '' if unsupported"""
+    key = os_type.lower()
+    resolved = _OS_ALIAS.get(key) or _OS_ALIAS.get(key.split('/', 1)[0])
+    if resolved:
+        return resolved
+    # Versioned names such as 'centos7' or 'ubuntu-22.04' resolve to their family
+    if key.startswith(_OS_FAMILIES):
+        return next(_OS_ALIAS[family] for family in _OS_FAMILIES if key.startswith(family))
+    return ''
+
 def get_command(os_type: str, metric: str) -> str:
-    return COMMANDS.get(os_type, {}).get(metric, '') 
\ No newline at end of file
+    return _FLAT.get((resolve_os(os_type), metric), '') 
\ No newline at end of file
@@ -0,0 +1,20 @@
+import os
+from typing import Any, Optional
+
+try:
+    from core import _generated_config
+except ImportError:  # build_config.py has not been run; configs are parsed at runtime
+    _generated_config = None
+
+
+def embedded_config(name: str, source: str) -> Optional[Any]:
+    """Return the build-time value of a config constant, or None if it is missing or its source changed since"""
+    if _generated_config is None or source not in _generated_config.SOURCES:
+        return None
+    try:
+        mtime = os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if mtime is None or mtime != _generated_config.SOURCES[source]:
+        return None
+    return getattr(_generated_config, name, None)
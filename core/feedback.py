@@ -1,17 +1,69 @@
-import json
+import atexit
+import logging
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+
+import orjson
+
+from core.clock import iso_now
+
+logger = logging.getLogger(__name__)
 
 FEEDBACK_FILE = 'logs/feedback.jsonl'
 
+# Entries are written by a background thread in batches of up to this many, at most this long after arrival
+FEEDBACK_BATCH_SIZE = 512
+FEEDBACK_FLUSH_INTERVAL = 0.5
+# Large userspace buffer so a batch reaches the kernel in one write
+FEEDBACK_BUFFER_SIZE = 256 * 1024
+
+_feedback_q = queue.Queue()
+_feedback_lock = threading.Lock()
+_feedback_thread = None
+
+def _feedback_writer():
+    f = None
+    while True:
+        batch = [_feedback_q.get()]
+        deadline = time.monotonic() + FEEDBACK_FLUSH_INTERVAL
+        while len(batch) < FEEDBACK_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_feedback_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            if f is None:
+                os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
+                f = open(FEEDBACK_FILE, 'ab', buffering=FEEDBACK_BUFFER_SIZE)
+            f.write(b''.join(orjson.dumps(entry) + b'\n' for entry in batch))
+            f.flush()
+        except Exception as e:
+            logger.error("Error writing %s feedback entries: %s", len(batch), e, exc_info=True)
+        finally:
+            for _ in batch:
+                _feedback_q.task_done()
+
 def submit_feedback(user: str, query: str, rating: int, comments: str = ""):
+    global _feedback_thread
     entry = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': iso_now(),
         'user': user,
         'query': query,
         'rating': rating,
         'comments': comments
     }
-    os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
-    with open(FEEDBACK_FILE, 'a') as f:
-        f.write(json.dumps(entry) + '\n') 
\ No newline at end of file
+    # Threads do not survive fork; (re)start the writer in this process if needed
+    if _feedback_thread is None or not _feedback_thread.is_alive():
+        with _feedback_lock:
+            if _feedback_thread is None or not _feedback_thread.is_alive():
+                _feedback_thread = threading.Thread(target=_feedback_writer, name='feedback-writer', daemon=True)
+                _feedback_thread.start()
+    _feedback_q.put(entry)
+
+# Make sure queued feedback reaches the disk before the interpreter exits
+atexit.register(_feedback_q.join)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434')
+DEFAULT_MODEL = 'mistral:7b-instruct-q4_K_M'
+
+# How long Ollama keeps the model (and its KV cache) loaded after a request
+KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+# Interval between keepalive pings; must stay below KEEP_ALIVE
+KEEPALIVE_INTERVAL = 20 * 60
+
+# Connection pool for the Ollama client; idle connections are kept long enough to span request bursts
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=50, keepalive_expiry=30.0)
+# Generation can legitimately take minutes, so only connecting is bounded
+HTTP_TIMEOUT = httpx.Timeout(None, connect=10.0)
+
+# Batching window: flush after MAX_BATCH prompts or MAX_WAIT_MS, whichever comes first
+MAX_BATCH = 16
+MAX_WAIT_MS = 10
+
+
+class LLMBatcher:
+    """Coalesces prompts submitted concurrently into batches sent to Ollama over one shared client"""
+
+    def __init__(self, model: str = DEFAULT_MODEL, options: Optional[Dict] = None,
+                 max_batch: int = MAX_BATCH, max_wait_ms: int = MAX_WAIT_MS):
+        self.model = model
+        self.options = options or {}
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._loop = None
+        self._queue = None
+        self._client = None
+        self._worker = None
+        # Dispatched batches; the loop only holds weak references to tasks
+        self._inflight = set()
+
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt and wait for its completion"""
+        loop = asyncio.get_running_loop()
+        if self._loop is None or self._loop.is_closed():
+            self._start(loop)
+        elif self._loop is not loop:
+            # The queue and client belong to the loop that started the worker; queue the prompt there
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.submit(prompt), self._loop))
+
+        future = loop.create_future()
+        await self._queue.put((prompt, future))
+        return await future
+
+    async def warm(self, prompts: List[str]):
+        """Prefill the given static prompt prefixes so the model and their KV cache are resident"""
+        if self._loop is None:
+            self._start(asyncio.get_running_loop())
+        results = await asyncio.gather(
+            *(self._generate(self._client, prompt, num_predict=1) for prompt in prompts),
+            return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, BaseException)]
+        if failures:
+            logger.warning("LLM warmup failed for %s of %s prompts: %s", len(failures), len(prompts), failures[0])
+        else:
+            logger.info("Warmed %s prompt prefixes on %s", len(prompts), self.model)
+
+    async def keep_warm(self, prompts: List[str], interval: int = KEEPALIVE_INTERVAL):
+        """Warm the prompts now and ping again periodically so the model is never unloaded"""
+        while True:
+            await self.warm(prompts)
+            await asyncio.sleep(interval)
+
+    async def aclose(self):
+        """Stop the worker and close the pooled connections; call from the loop that started it"""
+        if self._loop is None:
+            return
+        self._worker.cancel()
+        await self._client.aclose()
+        self._loop = self._queue = self._client = self._worker = None
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._client = httpx.AsyncClient(base_url=OLLAMA_URL, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Collect prompts into batches and dispatch each batch without blocking collection"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = self._loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        logger.debug("Dispatching LLM batch of %s prompts", len(batch))
+        results = await asyncio.gather(
+            *(self._generate(self._client, prompt) for prompt, _ in batch),
+            return_exceptions=True
+        )
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # caller went away
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _generate(self, client: httpx.AsyncClient, prompt: str, **options) -> str:
+        response = await client.post('/api/generate', json={
+            'model': self.model,
+            'prompt': prompt,
+            'stream': False,
+            'keep_alive': KEEP_ALIVE,
+            'options': {**self.options, **options}
+        })
+        response.raise_for_status()
+        return response.json()['response']
+
+
+batcher = LLMBatcher(options={'temperature': 0.2, 'num_ctx': 4096, 'num_predict': 512})
@@ -0,0 +1,75 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+# Blocking work handed off with asyncio.to_thread (paramiko sessions, LLM calls, file reads)
+BLOCKING_WORKERS = int(os.environ.get('BLOCKING_WORKERS', '32'))
+# How long shutdown waits for the loop's resources to close
+SHUTDOWN_TIMEOUT = 5
+
+_loop = None
+_loop_lock = threading.Lock()
+# Coroutine functions closing resources owned by the loop, run on it at exit
+_shutdown_hooks: List[Callable[[], Awaitable]] = []
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop, starting its thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix='blocking'))
+                threading.Thread(target=loop.run_forever, name='event-loop', daemon=True).start()
+                _loop = loop
+    return _loop
+
+def run(coro):
+    """Run a coroutine on the shared loop from synchronous code and wait for its result"""
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run() called from the shared event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+def on_shutdown(hook: Callable[[], Awaitable]):
+    """Register a coroutine function to close a resource of the shared loop at exit"""
+    _shutdown_hooks.append(hook)
+    return hook
+
+async def _run_shutdown_hooks():
+    for hook in _shutdown_hooks:
+        try:
+            await hook()
+        except Exception as e:
+            logger.warning("Error closing %s: %s", getattr(hook, '__qualname__', hook), e)
+
+def _shutdown():
+    loop = _loop
+    # Not started, or already stopped by an earlier call
+    if loop is None or not loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_run_shutdown_hooks(), loop).result(SHUTDOWN_TIMEOUT)
+    except Exception as e:
+        logger.warning("Error shutting down the event loop: %s", e)
+    loop.call_soon_threadsafe(loop.stop)
+
+def _reset_after_fork():
+    # The loop thread does not survive fork; the child starts its own loop on first use
+    global _loop, _loop_lock
+    _loop = None
+    _loop_lock = threading.Lock()
+
+atexit.register(_shutdown)
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,10 @@
+import re
+
+RISKY_TERMS = ["remove", "delete", "drop", "truncate", "restart", "stop"]
+STEP_FIELDS = ["step", "purpose", "validation"]
+
+_RISKY_RE = re.compile("|".join(RISKY_TERMS))
+
+
+def is_risky(step_text: str) -> bool:
+    return _RISKY_RE.search(step_text.lower()) is not None
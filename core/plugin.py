@@ -1,22 +1,36 @@
 import importlib
-import os
+import importlib.resources
+from concurrent.futures import ThreadPoolExecutor
 
 PLUGIN_DIR = 'plugins'
+# Plugin modules imported concurrently; each may do its own I/O at import
+PLUGIN_LOAD_WORKERS = 4
 
 class PluginManager:
     def __init__(self):
         self.plugins = {}
+        self.loaded = False
 
     def load_plugins(self):
-        for fname in os.listdir(PLUGIN_DIR):
-            if fname.endswith('.py') and not fname.startswith('_'):
-                modname = fname[:-3]
-                module = importlib.import_module(f'{PLUGIN_DIR}.{modname}')
-                if hasattr(module, 'register'):
-                    self.plugins[modname] = module.register()
+        # Resolved through the import system, so it does not depend on the working directory
+        modnames = sorted(
+            entry.name[:-3] for entry in importlib.resources.files(PLUGIN_DIR).iterdir()
+            if entry.name.endswith('.py') and not entry.name.startswith('_')
+        )
+        with ThreadPoolExecutor(max_workers=PLUGIN_LOAD_WORKERS, thread_name_prefix='plugin-load') as pool:
+            modules = list(pool.map(lambda modname: importlib.import_module(f'{PLUGIN_DIR}.{modname}'), modnames))
+        for modname, module in zip(modnames, modules):
+            if hasattr(module, 'register'):
+                self.plugins[modname] = module.register()
+        self.loaded = True
 
     def get_plugin(self, name):
         return self.plugins.get(name)
 
 plugin_manager = PluginManager()
-plugin_manager.load_plugins() 
\ No newline at end of file
+
+def load_plugins() -> PluginManager:
+    """Load the plugins once; called at application startup rather than when this module is imported"""
+    if not plugin_manager.loaded:
+        plugin_manager.load_plugins()
+    return plugin_manager
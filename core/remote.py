@@ -1,13 +1,25 @@
-import paramiko
-import logging
 import random
 import os
-import glob
-from typing import Tuple
-from loguru import logger
+import asyncio
+import atexit
+import contextlib
+import socket
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from core.audit import queued_logger
+from core.loop import get_loop, on_shutdown
 
-# Configure logger
-log = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    import paramiko
+
+try:
+    import asyncssh
+except ImportError:  # asyncssh is optional; paramiko is then run in worker threads
+    asyncssh = None
+
+# Configure logger; records are written to the console and audit log on a background thread
+logger = queued_logger(__name__)
 
 # Check if we're in simulation mode (for development/testing)
 SIMULATION_MODE = os.environ.get('SIMULATION_MODE', 'false').lower() in ('true', '1', 'yes')
@@ -15,6 +27,13 @@ SIMULATION_MODE = os.environ.get('SIMULATION_MODE', 'false').lower() in ('true',
 # Base directory for vagrant private keys
 VAGRANT_DIR = 'Local_infra_setup_script_IaC/.vagrant'
 
+# Pooled SSH connections: at most SSH_POOL_SIZE (host, user) pairs are kept, least recently used evicted
+SSH_POOL_SIZE = int(os.environ.get('SSH_POOL_SIZE', '32'))
+# Seconds between keepalive packets so idle pooled connections are not dropped by NAT or sshd
+SSH_KEEPALIVE = 30
+# Concurrent commands multiplexed over one asyncssh connection, below sshd's default MaxSessions of 10
+SSH_MAX_SESSIONS = int(os.environ.get('SSH_MAX_SESSIONS', '8'))
+
 # Simulated responses for different commands
 SIMULATED_RESPONSES = {
     'systemctl status nginx': (True, '''
@@ -84,112 +103,382 @@ tmpfs           5.0M     0  5.0M   0% /run/lock
 '''),
 }
 
+# Vagrant machine name -> private key path, and every key found, built by one scan of VAGRANT_DIR
+_KEY_INDEX: Dict[str, str] = {}
+_KEY_PATHS: List[Tuple[Tuple[str, ...], str]] = []
+_key_index_lock = threading.Lock()
+_key_index_built = False
+
+def _scan_private_keys(path: str, found: List[str]):
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            _scan_private_keys(entry.path, found)
+        elif entry.name == 'private_key':
+            found.append(entry.path)
+
+def _build_key_index():
+    """Index the private keys under VAGRANT_DIR so lookups need no filesystem access"""
+    global _key_index_built
+    with _key_index_lock:
+        if _key_index_built:
+            return
+        found: List[str] = []
+        _scan_private_keys(VAGRANT_DIR, found)
+        for path in found:
+            _KEY_PATHS.append((tuple(os.path.relpath(path, VAGRANT_DIR).split(os.sep)[:-1]), path))
+        # machines/<name>/<provider>/private_key takes precedence over <dir>/<name>/private_key
+        for dirs, path in _KEY_PATHS:
+            if len(dirs) == 3 and dirs[0] == 'machines':
+                _KEY_INDEX.setdefault(dirs[1], path)
+        for dirs, path in _KEY_PATHS:
+            if len(dirs) == 2:
+                _KEY_INDEX.setdefault(dirs[1], path)
+        _key_index_built = True
+        logger.info("Indexed %s private keys under %s", len(found), VAGRANT_DIR)
+
 def find_private_key(server_name: str) -> str:
     """Find the private key file for a given server"""
+    if not _key_index_built:
+        _build_key_index()
     # Check for server-specific key first
-    key_patterns = [
-        f"{VAGRANT_DIR}/machines/{server_name}/*/private_key",
-        f"{VAGRANT_DIR}/*/{server_name}/private_key",
-        f"{VAGRANT_DIR}/**/{server_name}*/**/private_key"
-    ]
-    
-    for pattern in key_patterns:
-        matches = glob.glob(pattern, recursive=True)
-        if matches:
-            logger.info(f"Found private key for {server_name}: {matches[0]}")
-            return matches[0]
-    
+    key = _KEY_INDEX.get(server_name)
+    if key is None:
+        # Any directory on the key's path named after the server
+        key = next((path for dirs, path in _KEY_PATHS if any(d.startswith(server_name) for d in dirs)), None)
+    if key is not None:
+        logger.info("Found private key for %s: %s", server_name, key)
+        return key
+
     # Fallback to any available key
-    all_keys = glob.glob(f"{VAGRANT_DIR}/**/private_key", recursive=True)
-    if all_keys:
-        logger.info(f"Using fallback private key for {server_name}: {all_keys[0]}")
-        return all_keys[0]
-    
-    logger.warning(f"No private key found for {server_name}")
+    if _KEY_PATHS:
+        key = _KEY_PATHS[0][1]
+        logger.info("Using fallback private key for %s: %s", server_name, key)
+        return key
+
+    logger.warning("No private key found for %s", server_name)
     return ""
 
+# First word (the program) -> first simulated command using it and its response
+_SIM_PREFIX: Dict[str, Tuple[str, Tuple[bool, str]]] = {}
+for _pattern, _response in SIMULATED_RESPONSES.items():
+    _SIM_PREFIX.setdefault(_pattern.split(None, 1)[0], (_pattern, _response))
+
+def _simulate_command(host: str, user: str, command: str, server_name: str) -> Tuple[bool, str]:
+    """Canned output used in simulation mode instead of a real SSH round-trip"""
+    logger.info("[SIMULATION MODE] Executing command on %s (%s): '%s'", host, server_name, command)
+    
+    # Check for exact command match
+    if command in SIMULATED_RESPONSES:
+        success, output = SIMULATED_RESPONSES[command]
+        logger.info("[SIMULATION MODE] Returning simulated response for '%s'", command)
+        return success, output
+        
+    # Check for a response to another command with the same program
+    words = command.split(None, 1)
+    match = _SIM_PREFIX.get(words[0]) if words else None
+    if match is not None:
+        cmd_pattern, (success, output) = match
+        logger.info("[SIMULATION MODE] Returning simulated response for pattern '%s'", cmd_pattern)
+        return success, output
+    
+    # Default response for unknown commands
+    if 'status' in command:
+        logger.info("[SIMULATION MODE] Returning generic status response")
+        return True, f"Service is running\nSimulated response for: {command}"
+        
+    logger.info("[SIMULATION MODE] No matching simulation, returning generic response")
+    return True, f"Simulated output for: {command}\nServer: {host}\nUser: {user}"
+
+def _connect(host: str, user: str, key_file: str, password: str, timeout: int) -> 'paramiko.SSHClient':
+    """Open and authenticate a new SSH connection"""
+    import paramiko
+    logger.info("Connecting to %s as %s%s", host, user, f" using key {key_file}" if key_file else "")
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    
+    # Use private key if available, fall back to password
+    if key_file and os.path.exists(key_file):
+        try:
+            ssh.connect(
+                hostname=host,
+                username=user,
+                key_filename=key_file,
+                timeout=timeout
+            )
+        except paramiko.SSHException as e:
+            logger.warning("Failed to connect with key, trying without key: %s", e)
+            if password:
+                ssh.connect(host, username=user, password=password, timeout=timeout)
+            else:
+                raise
+    else:
+        # Fall back to password authentication if no key available
+        if password:
+            ssh.connect(host, username=user, password=password, timeout=timeout)
+        else:
+            raise paramiko.AuthenticationException("No private key or password provided")
+    
+    ssh.get_transport().set_keepalive(SSH_KEEPALIVE)
+    return ssh
+
+class SSHPool:
+    """Keeps one authenticated connection per (host, user); commands run as separate channels on it"""
+    
+    def __init__(self, max_size: int = SSH_POOL_SIZE):
+        self.max_size = max_size
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, host: str, user: str, key_file: str = "", password: str = None, timeout: int = 30) -> 'paramiko.SSHClient':
+        """Return a live client for host/user, connecting if there is none"""
+        key = (host, user)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    self._clients.move_to_end(key)
+                    return client
+                del self._clients[key]
+                client.close()
+        
+        # Handshake outside the lock so other hosts are not held up
+        client = _connect(host, user, key_file, password, timeout)
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                # Another thread connected first; keep its connection
+                client.close()
+                self._clients.move_to_end(key)
+                return existing
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                _, evicted = self._clients.popitem(last=False)
+                evicted.close()
+        return client
+    
+    def invalidate(self, host: str, user: str, client: 'paramiko.SSHClient'):
+        """Drop a connection that failed so the next get reconnects"""
+        with self._lock:
+            if self._clients.get((host, user)) is client:
+                del self._clients[(host, user)]
+        client.close()
+    
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+ssh_pool = SSHPool()
+atexit.register(ssh_pool.close_all)
+
 def run_ssh_command(host: str, user: str, password: str = None, command: str = "", timeout: int = 30, server_name: str = "") -> Tuple[bool, str]:
     """Execute a command on a remote server via SSH"""
     if not host or not command:
-        log.error(f"Missing required parameter: host={bool(host)}, command={bool(command)}")
+        logger.error("Missing required parameter: host=%s, command=%s", bool(host), bool(command))
         return False, "Missing required parameters for SSH connection"
     
     # Use simulation mode for development/testing
     if SIMULATION_MODE:
-        logger.info(f"[SIMULATION MODE] Executing command on {host} ({server_name}): '{command}'")
-        
-        # Check for exact command match
-        if command in SIMULATED_RESPONSES:
-            success, output = SIMULATED_RESPONSES[command]
-            logger.info(f"[SIMULATION MODE] Returning simulated response for '{command}'")
-            return success, output
-            
-        # Check for command pattern match
-        for cmd_pattern, (success, output) in SIMULATED_RESPONSES.items():
-            if command.startswith(cmd_pattern.split()[0]):
-                logger.info(f"[SIMULATION MODE] Returning simulated response for pattern '{cmd_pattern}'")
-                return success, output
+        return _simulate_command(host, user, command, server_name)
         
-        # Default response for unknown commands
-        if 'status' in command:
-            logger.info(f"[SIMULATION MODE] Returning generic status response")
-            return True, f"Service is running\nSimulated response for: {command}"
-            
-        logger.info(f"[SIMULATION MODE] No matching simulation, returning generic response")
-        return True, f"Simulated output for: {command}\nServer: {host}\nUser: {user}"
-        
-    # Real SSH connection
+    # Real SSH connection; paramiko (and cryptography) are only loaded once one is needed
+    import paramiko
     try:
         # Find private key for this server if server_name is provided
         key_file = ""
         if server_name:
             key_file = find_private_key(server_name)
         
-        logger.info(f"Connecting to {host} as {user}" + (f" using key {key_file}" if key_file else ""))
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
-        # Use private key if available, fall back to password
-        if key_file and os.path.exists(key_file):
+        for attempt in range(2):
+            ssh = ssh_pool.get(host, user, key_file, password, timeout)
             try:
-                ssh.connect(
-                    hostname=host,
-                    username=user,
-                    key_filename=key_file,
-                    timeout=timeout
-                )
-            except paramiko.SSHException as e:
-                logger.warning(f"Failed to connect with key, trying without key: {str(e)}")
-                if password:
-                    ssh.connect(host, username=user, password=password, timeout=timeout)
-                else:
+                logger.info("Executing command on %s: %s", host, command)
+                stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
+                break
+            except (paramiko.SSHException, EOFError, socket.error) as e:
+                # A dead pooled connection fails when opening the channel, before the command
+                # has started, so reconnecting and retrying once is safe
+                ssh_pool.invalidate(host, user, ssh)
+                if attempt:
                     raise
-        else:
-            # Fall back to password authentication if no key available
-            if password:
-                ssh.connect(host, username=user, password=password, timeout=timeout)
-            else:
-                raise paramiko.AuthenticationException("No private key or password provided")
-        
-        logger.info(f"Executing command on {host}: {command}")
-        stdin, stdout, stderr = ssh.exec_command(command, timeout=timeout)
+                logger.warning("Pooled connection to %s failed, reconnecting: %s", host, e)
         
         output = stdout.read().decode()
         error = stderr.read().decode()
-        ssh.close()
         
         if error:
-            logger.warning(f"Command returned error on {host}: {error.strip()}")
+            logger.warning("Command returned error on %s: %s", host, error.strip())
             return False, error.strip()
             
-        logger.info(f"Command executed successfully on {host}")
+        logger.info("Command executed successfully on %s", host)
         return True, output.strip()
     except paramiko.AuthenticationException:
-        logger.error(f"Authentication failed for {user}@{host}")
+        logger.error("Authentication failed for %s@%s", user, host)
         return False, "Authentication failed"
     except paramiko.SSHException as e:
-        logger.error(f"SSH connection error to {host}: {str(e)}")
+        logger.error("SSH connection error to %s: %s", host, e)
+        return False, f"SSH connection error: {str(e)}"
+    except Exception as e:
+        logger.error("Error executing command on %s: %s", host, e)
+        return False, str(e)
+
+async def _connect_async(host: str, user: str, key_file: str, password: str, timeout: int):
+    """Open and authenticate a new asyncssh connection"""
+    logger.info("Connecting to %s as %s%s", host, user, f" using key {key_file}" if key_file else "")
+    options = dict(username=user, known_hosts=None, connect_timeout=timeout, keepalive_interval=SSH_KEEPALIVE)
+    
+    # Use private key if available, fall back to password
+    if key_file and os.path.exists(key_file):
+        try:
+            return await asyncssh.connect(host, client_keys=[key_file], **options)
+        except asyncssh.PermissionDenied as e:
+            logger.warning("Failed to connect with key, trying without key: %s", e)
+            if not password:
+                raise
+    elif not password:
+        raise asyncssh.PermissionDenied("No private key or password provided")
+    return await asyncssh.connect(host, password=password, client_keys=None, **options)
+
+class _PooledHost:
+    """Pool entry for one (host, user): its connection and the sessions multiplexed over it"""
+    
+    __slots__ = ('conn', 'sessions', 'connect_lock', 'active')
+    
+    def __init__(self):
+        self.conn = None
+        self.sessions = asyncio.Semaphore(SSH_MAX_SESSIONS)
+        self.connect_lock = asyncio.Lock()
+        # Commands running on or waiting for this connection
+        self.active = 0
+
+class AsyncSSHPool:
+    """asyncssh connections for one event loop, one per (host, user), each multiplexing up to SSH_MAX_SESSIONS commands"""
+    
+    def __init__(self, max_size: int = SSH_POOL_SIZE):
+        self.max_size = max_size
+        self._hosts = OrderedDict()
+    
+    @contextlib.asynccontextmanager
+    async def session(self, host: str, user: str, key_file: str = "", password: str = None, timeout: int = 30):
+        """Hold one of host/user's session slots and yield a live connection, connecting if there is none"""
+        key = (host, user)
+        entry = self._hosts.get(key)
+        if entry is None:
+            entry = self._hosts[key] = _PooledHost()
+        self._hosts.move_to_end(key)
+        entry.active += 1
+        try:
+            async with entry.sessions:
+                if entry.conn is None or entry.conn.is_closed():
+                    # One handshake per host even when many commands arrive at once
+                    async with entry.connect_lock:
+                        if entry.conn is None or entry.conn.is_closed():
+                            entry.conn = await _connect_async(host, user, key_file, password, timeout)
+                yield entry.conn
+        finally:
+            entry.active -= 1
+            self._evict_idle()
+    
+    def _evict_idle(self):
+        """Drop least recently used hosts past max_size; hosts with commands in flight are kept until they finish"""
+        excess = len(self._hosts) - self.max_size
+        for key in list(self._hosts):
+            if excess <= 0:
+                break
+            entry = self._hosts[key]
+            if entry.active:
+                continue
+            del self._hosts[key]
+            if entry.conn is not None:
+                entry.conn.close()
+            excess -= 1
+    
+    def invalidate(self, host: str, user: str, conn):
+        entry = self._hosts.get((host, user))
+        if entry is not None and entry.conn is conn:
+            entry.conn = None
+        conn.close()
+    
+    async def aclose(self):
+        """Close every pooled connection"""
+        conns = [entry.conn for entry in self._hosts.values() if entry.conn is not None]
+        self._hosts.clear()
+        for conn in conns:
+            conn.close()
+        await asyncio.gather(*(conn.wait_closed() for conn in conns), return_exceptions=True)
+
+# asyncssh connections are bound to the loop that opened them, so the pool lives on the shared loop
+_async_pool = None
+_async_pool_loop = None
+
+def _get_async_pool() -> AsyncSSHPool:
+    global _async_pool, _async_pool_loop
+    loop = get_loop()
+    # A forked child has its own loop and must not use the parent's connections
+    if _async_pool is None or _async_pool_loop is not loop:
+        _async_pool = AsyncSSHPool()
+        _async_pool_loop = loop
+    return _async_pool
+
+@on_shutdown
+async def _close_async_pool():
+    if _async_pool is not None and _async_pool_loop is get_loop():
+        await _async_pool.aclose()
+
+async def run_ssh_command_async(host: str, user: str, password: str = None, command: str = "", timeout: int = 30, server_name: str = "") -> Tuple[bool, str]:
+    """Execute a command on a remote server via asyncssh without leaving the event loop"""
+    if not host or not command:
+        logger.error("Missing required parameter: host=%s, command=%s", bool(host), bool(command))
+        return False, "Missing required parameters for SSH connection"
+    
+    if SIMULATION_MODE:
+        return _simulate_command(host, user, command, server_name)
+    
+    loop = get_loop()
+    if asyncio.get_running_loop() is not loop:
+        # Callers on another loop (the FastAPI app) run the command on the loop that owns the pool
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+            run_ssh_command_async(host, user, password, command, timeout, server_name), loop))
+    
+    try:
+        key_file = ""
+        if server_name:
+            key_file = find_private_key(server_name)
+        
+        pool = _get_async_pool()
+        for attempt in range(2):
+            async with pool.session(host, user, key_file, password, timeout) as conn:
+                try:
+                    logger.info("Executing command on %s: %s", host, command)
+                    result = await conn.run(command, timeout=timeout)
+                    break
+                except asyncssh.ChannelOpenError as e:
+                    # The session was refused before the command started, so retrying once is safe
+                    pool.invalidate(host, user, conn)
+                    if attempt:
+                        raise
+                    logger.warning("Pooled connection to %s failed, reconnecting: %s", host, e)
+        
+        error = result.stderr or ""
+        if error:
+            logger.warning("Command returned error on %s: %s", host, error.strip())
+            return False, error.strip()
+            
+        logger.info("Command executed successfully on %s", host)
+        return True, (result.stdout or "").strip()
+    except asyncssh.PermissionDenied:
+        logger.error("Authentication failed for %s@%s", user, host)
+        return False, "Authentication failed"
+    except asyncssh.Error as e:
+        logger.error("SSH connection error to %s: %s", host, e)
         return False, f"SSH connection error: {str(e)}"
     except Exception as e:
-        logger.error(f"Error executing command on {host}: {str(e)}")
-        return False, str(e) 
\ No newline at end of file
+        logger.error("Error executing command on %s: %s", host, e)
+        return False, str(e)
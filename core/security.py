@@ -1,8 +1,8 @@
-import yaml
 import re
 import os
 import logging
 from typing import List
+from core.embedded_config import embedded_config
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -38,26 +38,36 @@ DEFAULT_CMD_CFG = {
 # Load RBAC and command configs with error handling
 try:
     rbac_path = 'config/rbac.yaml'
-    if os.path.exists(rbac_path):
+    # Prefer the copy embedded by build_config.py; it is only used while the file is unchanged
+    RBAC = embedded_config('RBAC', rbac_path)
+    if RBAC is not None:
+        pass
+    elif os.path.exists(rbac_path):
+        # PyYAML is only needed when there is no embedded copy
+        import yaml
         with open(rbac_path) as f:
             RBAC = yaml.safe_load(f)
     else:
-        logger.warning(f"RBAC config not found at {rbac_path}, using defaults")
+        logger.warning("RBAC config not found at %s, using defaults", rbac_path)
         RBAC = DEFAULT_RBAC
 except Exception as e:
-    logger.error(f"Error loading RBAC config: {str(e)}")
+    logger.error("Error loading RBAC config: %s", e)
     RBAC = DEFAULT_RBAC
 
 try:
     cmd_path = 'config/commands.yaml'
-    if os.path.exists(cmd_path):
+    CMD_CFG = embedded_config('CMD_CFG', cmd_path)
+    if CMD_CFG is not None:
+        pass
+    elif os.path.exists(cmd_path):
+        import yaml
         with open(cmd_path) as f:
             CMD_CFG = yaml.safe_load(f)
     else:
-        logger.warning(f"Commands config not found at {cmd_path}, using defaults")
+        logger.warning("Commands config not found at %s, using defaults", cmd_path)
         CMD_CFG = DEFAULT_CMD_CFG
 except Exception as e:
-    logger.error(f"Error loading commands config: {str(e)}")
+    logger.error("Error loading commands config: %s", e)
     CMD_CFG = DEFAULT_CMD_CFG
 
 # Ensure whitelist and blacklist are lists
@@ -69,28 +79,38 @@ if not isinstance(CMD_CFG.get('blacklist', []), list):
     logger.warning("Commands blacklist is not a list, using defaults")
     CMD_CFG['blacklist'] = DEFAULT_CMD_CFG['blacklist']
 
+# Shell metacharacters stripped by sanitize_input
+_FORBIDDEN_CHARS = str.maketrans('', '', ';`$><')
+
 SAFE_COMMANDS = CMD_CFG['whitelist']
 BLOCKED_COMMANDS = CMD_CFG['blacklist']
 
+# Flattened RBAC: user -> role and user -> permission set, built once from the config
+# (unknown users get the viewer role)
+_EMPTY = frozenset()
+_ROLE_PERMS = {role: frozenset(info.get('permissions', [])) for role, info in RBAC['roles'].items()}
+_USER_ROLES = {user: info.get('role', 'viewer') for user, info in RBAC['users'].items()}
+_USER_PERMS = {user: _ROLE_PERMS.get(role, _EMPTY) for user, role in _USER_ROLES.items()}
+_DEFAULT_PERMS = _ROLE_PERMS.get('viewer', _EMPTY)
+
 # RBAC helpers
 def get_user_role(user: str) -> str:
-    return RBAC['users'].get(user, {}).get('role', 'viewer')
+    return _USER_ROLES.get(user, 'viewer')
 
 def has_permission(user: str, permission: str) -> bool:
-    role = get_user_role(user)
-    return permission in RBAC['roles'].get(role, {}).get('permissions', [])
+    return permission in _USER_PERMS.get(user, _DEFAULT_PERMS)
 
 # Command safety
 def is_command_safe(cmd: str) -> bool:
     # Disable security checks - allow all commands
-    logger.info(f"Security checks disabled, allowing command: '{cmd}'")
+    logger.info("Security checks disabled, allowing command: '%s'", cmd)
     return True
 
     # The following code is disabled but kept for reference
     """
     # Type check for cmd
     if not isinstance(cmd, str):
-        logger.error(f"Command is not a string: {type(cmd)}")
+        logger.error("Command is not a string: %s", type(cmd))
         return False
         
     # Always allow empty commands
@@ -100,30 +120,30 @@ def is_command_safe(cmd: str) -> bool:
     
     # Quick check for simple exact matches in the whitelist
     if cmd in SAFE_COMMANDS:
-        logger.info(f"Command matched exact safe command: {cmd}")
+        logger.info("Command matched exact safe command: %s", cmd)
         return True
         
     # Split the command into parts to handle simplified commands
     cmd_parts = cmd.split()
     if cmd_parts and cmd_parts[0] in ['ping', 'traceroute', 'tracert', 'dig', 'nslookup']:
         base_command = cmd_parts[0]
-        logger.info(f"Allowing common network diagnostic command: {base_command}")
+        logger.info("Allowing common network diagnostic command: %s", base_command)
         return True
         
     for blocked in BLOCKED_COMMANDS:
         # Ensure blocked is a string
         if not isinstance(blocked, str):
-            logger.warning(f"Blocked command is not a string: {type(blocked)}")
+            logger.warning("Blocked command is not a string: %s", type(blocked))
             continue
             
         if blocked in cmd:
-            logger.warning(f"Blocked unsafe command: {cmd}")
+            logger.warning("Blocked unsafe command: %s", cmd)
             return False
             
     for safe in SAFE_COMMANDS:
         # Ensure safe is a string
         if not isinstance(safe, str):
-            logger.warning(f"Safe command is not a string: {type(safe)}")
+            logger.warning("Safe command is not a string: %s", type(safe))
             continue
             
         try:
@@ -132,22 +152,21 @@ def is_command_safe(cmd: str) -> bool:
             # Then convert {placeholders} to regex patterns
             pattern = re.sub(r'\\\{[^}]+\\\}', r'.+', safe_escaped)
             if re.fullmatch(pattern, cmd):
-                logger.info(f"Command matched safe pattern: {safe}")
+                logger.info("Command matched safe pattern: %s", safe)
                 return True
         except re.error as e:
-            logger.error(f"Regex error with pattern from '{safe}': {str(e)}")
+            logger.error("Regex error with pattern from '%s': %s", safe, e)
             continue
     
-    logger.warning(f"Command not in whitelist: '{cmd}'")
+    logger.warning("Command not in whitelist: '%s'", cmd)
     return False
     """
 
 def sanitize_input(s: str) -> str:
     # Handle non-string input
     if not isinstance(s, str):
-        logger.error(f"Input is not a string: {type(s)}")
+        logger.error("Input is not a string: %s", type(s))
         return ""
         
     # Remove dangerous shell metacharacters, but preserve pipe (|) and ampersand (&) for command chaining
-    sanitized = re.sub(r'[;`$><]', '', s)
-    return sanitized 
\ No newline at end of file
+    return s.translate(_FORBIDDEN_CHARS) 
\ No newline at end of file
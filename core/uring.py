@@ -0,0 +1,100 @@
+import logging
+import os
+from typing import List
+
+try:
+    import liburing
+except ImportError:  # liburing is optional and Linux-only; plain os.write is used instead
+    liburing = None
+
+logger = logging.getLogger(__name__)
+
+RING_ENTRIES = 8
+
+
+class Appender:
+    """Appends buffers to a file through io_uring when available, otherwise with os.writev.
+
+    Each append is submitted as one vectored write and reaped lazily on the next append (or close),
+    so the caller can prepare the next batch while the kernel completes the previous one.
+    Only one write is ever in flight, which keeps records in submission order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._ring = None
+        self._cqe = None
+        self._pending = None
+        if liburing is not None:
+            try:
+                ring = liburing.Ring()
+                liburing.io_uring_queue_init(RING_ENTRIES, ring)
+                self._ring = ring
+                self._cqe = liburing.Cqe()
+            except Exception as e:
+                # Kernels without io_uring, seccomp-filtered containers, ...
+                logger.warning("io_uring unavailable, falling back to os.write: %s", e)
+
+    def append(self, buffers: List[bytes]):
+        """Append the buffers, in order, with a single O_APPEND write"""
+        if self._ring is None:
+            written = os.writev(self._fd, buffers)
+            self._finish_short_write(buffers, written)
+            return
+        self._reap()
+        iovec = liburing.Iovec(buffers)
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_writev(sqe, self._fd, iovec)
+        liburing.io_uring_submit(self._ring)
+        # The iovec array and its buffers must stay alive until the kernel has completed the write
+        self._pending = (buffers, iovec)
+
+    def flush(self):
+        """Wait for the in-flight write, if any"""
+        if self._ring is not None:
+            self._reap()
+
+    def sync(self):
+        """Flush and make the appended data durable"""
+        self.flush()
+        os.fdatasync(self._fd)
+
+    def size(self) -> int:
+        return os.fstat(self._fd).st_size
+
+    def is_current(self) -> bool:
+        """Whether the path still names the file this appender writes to (it may have been rotated away)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        fst = os.fstat(self._fd)
+        return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+    def close(self):
+        self.flush()
+        if self._ring is not None:
+            liburing.io_uring_queue_exit(self._ring)
+            self._ring = None
+        os.close(self._fd)
+
+    def _reap(self):
+        if self._pending is None:
+            return
+        (buffers, _), self._pending = self._pending, None
+        liburing.io_uring_wait_cqe(self._ring, self._cqe)
+        res = self._cqe[0].res
+        liburing.io_uring_cqe_seen(self._ring, self._cqe[0])
+        if res < 0:
+            raise OSError(-res, os.strerror(-res), self.path)
+        self._finish_short_write(buffers, res)
+
+    def _finish_short_write(self, buffers: List[bytes], written: int):
+        """Write whatever a short write (e.g. disk nearly full) left behind, synchronously"""
+        if written == sum(len(buf) for buf in buffers):
+            return
+        view = memoryview(b''.join(buffers))[written:]
+        while view:
+            view = view[os.write(self._fd, view):]
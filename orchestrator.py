@@ -1,14 +1,34 @@
-from flask import Flask, render_template, request, jsonify
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from agents import (
-    SupportCrew as AgentCrew,
+    get_crew,
     infra_config
 )
-import json
+import orjson
 import os
+import io
+import re
+import atexit
+import functools
+import itertools
+import queue
+import threading
+import time
 from pathlib import Path
 from typing import Dict, List
+from core.loop import run as run_on_loop
+from core.uring import Appender
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single dev server, nothing to coordinate with
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; rotated logs are then kept uncompressed
+    zstandard = None
 
 # Configure logging
 logging.basicConfig(
@@ -17,27 +37,204 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Append-only ticket log: one JSON record per line, later records of a ticket supersede earlier ones
+TICKET_DIR = os.path.join(os.path.dirname(__file__), 'tickets')
+TICKET_FILE = os.path.join(TICKET_DIR, 'ticket.jsonl')
+# The live log is rotated to ticket.jsonl.<time_ns> past this size; older rotations are zstd-compressed
+TICKET_ROTATE_BYTES = 16 * 1024 * 1024
+TICKET_ARCHIVE_LEVEL = 3
+# Rotated logs are only compressed once other workers can no longer be appending to them
+TICKET_ARCHIVE_GRACE = 60
+_TICKET_ARCHIVE_RE = re.compile(re.escape(os.path.basename(TICKET_FILE)) + r'\.(\d+)(\.zst)?$')
+# Serializes rotation and compression across worker processes
+TICKET_ROTATE_LOCK = os.path.join(TICKET_DIR, '.ticket.lock')
+# Pre-JSONL ticket store, migrated on first load
+LEGACY_TICKET_FILE = os.path.join(TICKET_DIR, 'ticket.json')
+
+# Serialized ticket records waiting for the background flusher
+_TICKET_Q = queue.Queue(maxsize=10_000)
+# A batch is written once it holds this many records or its oldest record is this old
+TICKET_BATCH_SIZE = 256
+TICKET_FLUSH_INTERVAL = 0.05
+# Appended tickets are fdatasync'ed at most this often, off the request path
+TICKET_SYNC_INTERVAL = 1.0
+
+# Ticket ids: process start time, pid and a per-process counter are unique across workers
+_TICKET_EPOCH = time.time_ns()
+_TICKET_COUNTER = itertools.count(1)
+
+def _new_ticket_id() -> str:
+    return f"TICKET-{_TICKET_EPOCH:x}-{os.getpid():x}-{next(_TICKET_COUNTER):x}"
+
+_ticket_lock = threading.Lock()
+_ticket_file = None
+_ticket_flusher_thread = None
+
+def _write_ticket_records(records: List[bytes]):
+    """Append serialized ticket records to the log in a single vectored write (io_uring on Linux)"""
+    global _ticket_file
+    with _ticket_lock:
+        # A ring inherited across fork belongs to the parent; open our own
+        if _ticket_file is None or _ticket_file.pid != os.getpid():
+            _ticket_file = Appender(TICKET_FILE)
+        elif not _ticket_file.is_current():
+            # Another worker rotated the log
+            _ticket_file.close()
+            _ticket_file = Appender(TICKET_FILE)
+        _ticket_file.append(records)
+
+def ticket_archives() -> List[str]:
+    """Rotated ticket logs, oldest first, compressed or not"""
+    archives = []
+    for entry in os.scandir(TICKET_DIR):
+        match = _TICKET_ARCHIVE_RE.match(entry.name)
+        if match:
+            archives.append((int(match.group(1)), entry.path))
+    return [path for _, path in sorted(archives)]
+
+def _compress_ticket_archives():
+    """zstd-compress rotated logs that are past the grace period"""
+    cutoff = time.time() - TICKET_ARCHIVE_GRACE
+    for path in ticket_archives():
+        if path.endswith('.zst') or os.path.getmtime(path) > cutoff:
+            continue
+        tmp = f"{path}.zst.tmp"
+        with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+            zstandard.ZstdCompressor(level=TICKET_ARCHIVE_LEVEL).copy_stream(src, dst)
+        os.replace(tmp, f"{path}.zst")
+        os.remove(path)
+        logger.info("Compressed %s", path)
+
+def _compress_ticket_archives_locked():
+    """Compress rotated logs past the grace period, serialized with rotation in other workers"""
+    with open(TICKET_ROTATE_LOCK, 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        _compress_ticket_archives()
+
+def _rotate_ticket_log():
+    """Rotate the live log once it passes TICKET_ROTATE_BYTES"""
+    global _ticket_file
+    with _ticket_lock:
+        if _ticket_file is None or _ticket_file.pid != os.getpid() or _ticket_file.size() < TICKET_ROTATE_BYTES:
+            return
+        _ticket_file.flush()
+        with open(TICKET_ROTATE_LOCK, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another worker may have rotated it while we waited for the lock
+            if _ticket_file.is_current():
+                archive = f"{TICKET_FILE}.{time.time_ns()}"
+                os.rename(TICKET_FILE, archive)
+                logger.info("Rotated %s to %s", TICKET_FILE, archive)
+            _ticket_file.close()
+            _ticket_file = None
+            if zstandard is not None:
+                _compress_ticket_archives()
+
+def _sync_ticket_file():
+    with _ticket_lock:
+        if _ticket_file is not None and _ticket_file.pid == os.getpid():
+            _ticket_file.sync()
+
+def _ticket_flusher():
+    last_sync = time.monotonic()
+    unsynced = False
+    # Rotated logs become compressible TICKET_ARCHIVE_GRACE after rotation; check on that cadence
+    # rather than waiting for the next rotation, which may never come
+    next_compress = time.monotonic()
+    while True:
+        if zstandard is not None and time.monotonic() >= next_compress:
+            try:
+                _compress_ticket_archives_locked()
+            except Exception as e:
+                logger.error("Error compressing rotated ticket logs: %s", e, exc_info=True)
+            next_compress = time.monotonic() + TICKET_ARCHIVE_GRACE
+        try:
+            batch = [_TICKET_Q.get(timeout=TICKET_SYNC_INTERVAL)]
+        except queue.Empty:
+            batch = []
+        deadline = time.monotonic() + TICKET_FLUSH_INTERVAL
+        while batch and len(batch) < TICKET_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_TICKET_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                _write_ticket_records(batch)
+                unsynced = True
+            except Exception as e:
+                logger.error("Error writing %s tickets: %s", len(batch), e, exc_info=True)
+            finally:
+                for _ in batch:
+                    _TICKET_Q.task_done()
+            try:
+                _rotate_ticket_log()
+            except Exception as e:
+                logger.error("Error rotating %s: %s", TICKET_FILE, e, exc_info=True)
+        if unsynced and time.monotonic() - last_sync >= TICKET_SYNC_INTERVAL:
+            try:
+                _sync_ticket_file()
+                unsynced = False
+            except Exception as e:
+                logger.error("Error syncing %s: %s", TICKET_FILE, e, exc_info=True)
+            last_sync = time.monotonic()
+
+def _enqueue_ticket_record(record: bytes):
+    """Hand a serialized ticket to the flusher, starting it if needed (threads do not survive fork)"""
+    global _ticket_flusher_thread
+    if _ticket_flusher_thread is None or not _ticket_flusher_thread.is_alive():
+        with _ticket_lock:
+            if _ticket_flusher_thread is None or not _ticket_flusher_thread.is_alive():
+                _ticket_flusher_thread = threading.Thread(target=_ticket_flusher, name='ticket-flusher', daemon=True)
+                _ticket_flusher_thread.start()
+    try:
+        _TICKET_Q.put_nowait(record)
+    except queue.Full:
+        logger.warning("Ticket queue full, writing ticket synchronously")
+        _write_ticket_records([record])
+
+def _drain_tickets():
+    """Make sure queued and in-flight tickets reach the disk before the interpreter exits"""
+    _TICKET_Q.join()
+    _sync_ticket_file()
+
+atexit.register(_drain_tickets)
+
 class SupportCrew:
     def __init__(self):
         """Initialize the support crew with necessary agents"""
-        self.agent_crew = AgentCrew()
+        self.agent_crew = get_crew()
         self.ticket_log = []
+        # Latest known state of each ticket, and how far into which log file it has been read
+        self._tickets = {}
+        self._log_file_id = None
+        self._log_offset = 0
+        self._refresh_lock = threading.Lock()
         self._load_tickets()
         logger.info("SupportCrew initialized with ExecutorAgent")
 
     def process_issue(self, issue_description: str) -> Dict:
         """Process a new issue and generate appropriate response"""
+        return run_on_loop(self.aprocess_issue(issue_description))
+
+    async def aprocess_issue(self, issue_description: str) -> Dict:
+        """process_issue for callers already running in an event loop"""
         try:
             # Create new ticket
             ticket = {
-                "id": f"TICKET-{len(self.ticket_log) + 1}",
+                "id": _new_ticket_id(),
                 "issue": issue_description,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.now(timezone.utc),
                 "status": "pending"
             }
 
             # Process the issue using the multi-agent system
-            result = self.agent_crew.process_request(issue_description)
+            result = await self.agent_crew.process_request(issue_description)
             
             # Extract category information from the result
             if result.get("status") == "success":
@@ -51,13 +248,14 @@ class SupportCrew:
             ticket["response"] = result
 
             # Add to ticket log
+            self._tickets[ticket["id"]] = ticket
             self.ticket_log.append(ticket)
-            self._save_tickets()
+            self._save_ticket(ticket)
 
             return result
 
         except Exception as e:
-            logger.error(f"Error processing issue: {str(e)}", exc_info=True)
+            logger.error("Error processing issue: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "error": str(e)
@@ -65,66 +263,155 @@ class SupportCrew:
 
     def execute_remediation(self, ticket_id: str, execution_data: dict) -> dict:
         """Execute approved remediation steps"""
+        return run_on_loop(self.aexecute_remediation(ticket_id, execution_data))
+
+    async def aexecute_remediation(self, ticket_id: str, execution_data: dict) -> dict:
+        """execute_remediation for callers already running in an event loop"""
         try:
-            # Validate ticket exists
-            ticket = next((t for t in self.ticket_log if t["id"] == ticket_id), None)
+            # Validate ticket exists; it may have been created by another worker since the last refresh
+            ticket = self._tickets.get(ticket_id)
+            if not ticket:
+                await asyncio.to_thread(self._refresh_tickets)
+                ticket = self._tickets.get(ticket_id)
             if not ticket:
                 raise ValueError(f"Ticket {ticket_id} not found")
 
             # Execute remediation
-            result = self.agent_crew.execute_resolution(execution_data)
+            result = await self.agent_crew.execute_resolution(execution_data)
             
             # Update ticket with execution result
             if ticket:
                 ticket["execution_result"] = result
                 ticket["status"] = "completed" if result.get("status") == "completed" else "failed"
-                self._save_tickets()
+                self._save_ticket(ticket)
 
             return result
 
         except Exception as e:
-            logger.error(f"Error during remediation execution: {str(e)}", exc_info=True)
+            logger.error("Error during remediation execution: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "error": str(e)
             }
 
     def get_ticket_log(self) -> List[Dict]:
-        """Get the ticket history"""
+        """Get the ticket history, including tickets written by other workers since the last call"""
+        try:
+            self._refresh_tickets()
+        except Exception as e:
+            logger.error("Error refreshing tickets: %s", e, exc_info=True)
         return self.ticket_log
 
     def _load_tickets(self):
-        """Load tickets from file"""
+        """Load tickets from the append-only log"""
         try:
-            ticket_file = os.path.join(os.path.dirname(__file__), 'tickets', 'ticket.json')
-            os.makedirs(os.path.dirname(ticket_file), exist_ok=True)
+            # Created once here; saves and the flusher rely on it existing
+            os.makedirs(TICKET_DIR, exist_ok=True)
+            
+            if not os.path.exists(TICKET_FILE) and not ticket_archives() and os.path.exists(LEGACY_TICKET_FILE):
+                self._migrate_legacy_tickets()
             
-            if os.path.exists(ticket_file):
-                with open(ticket_file, 'r') as f:
-                    self.ticket_log = json.load(f)
-            else:
-                self.ticket_log = []
+            self._refresh_tickets()
                 
         except Exception as e:
-            logger.error(f"Error loading tickets: {str(e)}", exc_info=True)
+            logger.error("Error loading tickets: %s", e, exc_info=True)
             self.ticket_log = []
 
-    def _save_tickets(self):
-        """Save tickets to file"""
+    def _refresh_tickets(self):
+        """Read only the records appended to the live log since the last read"""
+        with self._refresh_lock:
+            try:
+                st = os.stat(TICKET_FILE)
+                file_id, size = (st.st_dev, st.st_ino), st.st_size
+            except FileNotFoundError:
+                # Rotated and not yet recreated: everything is in the archives
+                file_id, size = (), 0
+            if file_id != self._log_file_id or size < self._log_offset:
+                # First load, or the log was rotated: rebuild from the archives and the new live file
+                self._log_file_id = file_id
+                self._log_offset = 0
+                changed = False
+                for archive in ticket_archives():
+                    changed |= self._merge_ticket_lines(self._read_archive(archive), archive)
+                if changed:
+                    self.ticket_log = list(self._tickets.values())
+            if size == self._log_offset:
+                return
+
+            with open(TICKET_FILE, 'rb') as f:
+                f.seek(self._log_offset)
+                data = f.read()
+            # Leave a partially written last line for the next read
+            end = data.rfind(b'\n') + 1
+            self._log_offset += end
+
+            if self._merge_ticket_lines(data[:end].splitlines(), TICKET_FILE):
+                self.ticket_log = list(self._tickets.values())
+
+    @staticmethod
+    def _read_archive(path: str):
+        """Yield the lines of a rotated log, decompressing as it streams"""
+        if not path.endswith('.zst'):
+            try:
+                with open(path, 'rb') as f:
+                    yield from f
+                return
+            except FileNotFoundError:
+                # Compressed by another worker since it was listed
+                path = f"{path}.zst"
+        if zstandard is None:
+            logger.warning("zstandard is not installed, skipping %s", path)
+            return
+        with open(path, 'rb') as f:
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                yield from io.BufferedReader(reader)
+
+    def _merge_ticket_lines(self, lines, source: str) -> bool:
+        """Merge serialized records into the ticket index; returns whether anything changed"""
+        changed = False
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                ticket = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                logger.warning("Skipping malformed line in %s", source)
+                continue
+            current = self._tickets.get(ticket["id"])
+            # Never let an older record replace a newer state already in memory
+            if current is None or ticket.get("updated_ns", 0) >= current.get("updated_ns", 0):
+                self._tickets[ticket["id"]] = ticket
+                changed = True
+        return changed
+
+    def _migrate_legacy_tickets(self):
+        """Convert the old single-document ticket.json into the JSONL log"""
+        with open(LEGACY_TICKET_FILE, 'rb') as f:
+            legacy_tickets = orjson.loads(f.read())
+        with open(TICKET_FILE, 'wb') as f:
+            f.write(b''.join(orjson.dumps(ticket) + b'\n' for ticket in legacy_tickets))
+        logger.info("Migrated %s tickets from %s to %s", len(legacy_tickets), LEGACY_TICKET_FILE, TICKET_FILE)
+
+    def _save_ticket(self, ticket: Dict):
+        """Queue the current state of a ticket for appending to the log"""
         try:
-            ticket_file = os.path.join(os.path.dirname(__file__), 'tickets', 'ticket.json')
-            os.makedirs(os.path.dirname(ticket_file), exist_ok=True)
-            
-            with open(ticket_file, 'w') as f:
-                json.dump(self.ticket_log, f, indent=2)
-            logger.info(f"Saved {len(self.ticket_log)} tickets to {ticket_file}")
+            # Revision stamp so readers keep the newest state of a ticket
+            ticket["updated_ns"] = time.time_ns()
+            # Serialize now so later in-place updates to the ticket cannot race the flusher
+            _enqueue_ticket_record(orjson.dumps(ticket) + b'\n')
+            logger.info("Queued ticket %s for %s", ticket['id'], TICKET_FILE)
             
         except Exception as e:
-            logger.error(f"Error saving tickets: {str(e)}", exc_info=True)
+            logger.error("Error saving ticket: %s", e, exc_info=True)
+
+@functools.cache
+def get_support_crew() -> SupportCrew:
+    """Return the process-wide SupportCrew, creating it on first use"""
+    return SupportCrew()
 
 # Example usage
 if __name__ == "__main__":
-    crew = SupportCrew()
+    crew = get_support_crew()
     print("Autonomous IT Support Agent\nType 'exit' to quit.\n")
     
     while True:
@@ -134,7 +421,7 @@ if __name__ == "__main__":
                 break
             result = crew.process_issue(user_issue)
             print("\n--- Result ---")
-            print(json.dumps(result, indent=2))
+            print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
         except KeyboardInterrupt:
             print("\nExiting gracefully...")
             break
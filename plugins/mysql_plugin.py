@@ -1,13 +1,21 @@
+from types import MappingProxyType
+
+def _check_logs():
+    return 'tail -n 100 /var/log/mysql/error.log'
+
+# Built once at import and read-only, so every caller of register() shares it
+_REGISTRATION = MappingProxyType({
+    'service': 'mysql',
+    'commands': (
+        'systemctl status mysql',
+        'mysql -V',
+        'mysqladmin status',
+        'tail -n 100 /var/log/mysql/error.log',
+    ),
+    'handlers': MappingProxyType({
+        'check_logs': _check_logs,
+    })
+})
+
 def register():
-    return {
-        'service': 'mysql',
-        'commands': [
-            'systemctl status mysql',
-            'mysql -V',
-            'mysqladmin status',
-            'tail -n 100 /var/log/mysql/error.log',
-        ],
-        'handlers': {
-            'check_logs': lambda: 'tail -n 100 /var/log/mysql/error.log',
-        }
-    } 
\ No newline at end of file
+    return _REGISTRATION
@@ -61,15 +61,15 @@ function updateTicketHistory(tickets) {
     ticketLog.innerHTML = tickets.map(ticket => `
         <tr>
             <td>${new Date(ticket.timestamp).toLocaleString()}</td>
-            <td>${ticket.issue.substring(0, 50)}${ticket.issue.length > 50 ? '...' : ''}</td>
+            <td>${escapeHtml(ticket.issue.substring(0, 50))}${ticket.issue.length > 50 ? '...' : ''}</td>
             <td>
                 <span class="badge ${getBadgeClass(ticket.category)}">
-                    ${ticket.category || 'unknown'}
+                    ${escapeHtml(ticket.category) || 'unknown'}
                 </span>
             </td>
             <td>
                 <span class="badge ${getStatusBadgeClass(ticket.status)}">
-                    ${ticket.status || 'unknown'}
+                    ${escapeHtml(ticket.status) || 'unknown'}
                 </span>
             </td>
             <td>
@@ -848,6 +848,12 @@ function formatApiResponse(result) {
 
 // Initialize tooltips and popovers
 document.addEventListener('DOMContentLoaded', function() {
+    // Render the ticket history embedded by the server
+    const ticketLogData = document.getElementById('ticketLogData');
+    if (ticketLogData) {
+        updateTicketHistory(JSON.parse(ticketLogData.textContent));
+    }
+    
     const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
     tooltipTriggerList.map(function(tooltipTriggerEl) {
         return new bootstrap.Tooltip(tooltipTriggerEl);
@@ -1,3 +1,4 @@
+from functools import partial
 from crewai import Task
 from agents import (
     classify_issue,
@@ -17,7 +18,7 @@ class TaskFactory:
             agent="classifier_agent",
             async_execution=False,
             allow_delegation=True,
-            run=lambda: classify_issue(user_input)
+            run=partial(classify_issue, user_input)
         )
 
     def create_general_query_task(self, user_query: str):
@@ -27,7 +28,7 @@ class TaskFactory:
             agent="general_query_agent",
             async_execution=False,
             allow_delegation=True,
-            run=lambda: general_query_handler(user_query)
+            run=partial(general_query_handler, user_query)
         )
 
     def create_resolution_task(self, issue_text: str):
@@ -37,7 +38,7 @@ class TaskFactory:
             agent="resolver_agent",
             async_execution=False,
             allow_delegation=True,
-            run=lambda: resolve_issue(issue_text)
+            run=partial(resolve_issue, issue_text)
         )
 
     def create_validation_task(self, resolution: dict):
@@ -47,5 +48,5 @@ class TaskFactory:
             agent="validator_agent",
             async_execution=False,
             allow_delegation=True,
-            run=lambda: validate_resolution(resolution)
+            run=partial(validate_resolution, resolution)
         )
@@ -0,0 +1,52 @@
+import random
+import statistics
+import unittest
+
+from core.anomaly import analyze_server_metrics, detect_anomalies
+
+
+def reference_anomalies(values, threshold=2.5):
+    """Indices whose z-score exceeds the threshold, computed with the statistics module"""
+    if len(values) < 2:
+        return []
+    mean = statistics.mean(values)
+    stdev = statistics.stdev(values)
+    if stdev == 0:
+        return []
+    return [i for i, v in enumerate(values) if abs(v - mean) / stdev > threshold]
+
+
+class DetectAnomaliesTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.series = []
+        for length in (2, 5, 30, 200):
+            values = [rng.gauss(50, 5) for _ in range(length)]
+            if length > 5:
+                values[length // 2] = 500.0
+            self.series.append(values)
+
+    def test_matches_statistics_reference(self):
+        for values in self.series:
+            self.assertEqual(detect_anomalies(values), reference_anomalies(values))
+        self.assertIn(100, detect_anomalies(self.series[-1]))
+
+    def test_short_and_constant_series_have_no_anomalies(self):
+        self.assertEqual(detect_anomalies([]), [])
+        self.assertEqual(detect_anomalies([1.0]), [])
+        self.assertEqual(detect_anomalies([3.0] * 10), [])
+
+    def test_server_metrics_match_per_series_reference(self):
+        metrics = {f'm{i}': values for i, values in enumerate(self.series)}
+        metrics['same_length'] = list(reversed(self.series[-1]))
+        metrics['constant'] = [1.0] * 30
+
+        anomalies = analyze_server_metrics(metrics)
+
+        self.assertEqual(list(anomalies), list(metrics))
+        for metric, values in metrics.items():
+            self.assertEqual(anomalies[metric], reference_anomalies(values), metric)
+
+
+if __name__ == '__main__':
+    unittest.main()
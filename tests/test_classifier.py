@@ -0,0 +1,19 @@
+import unittest
+
+from agents import classify_issue
+
+
+class OverviewFastPathTest(unittest.TestCase):
+    def test_overview_request_is_general_query(self):
+        self.assertEqual(classify_issue("show infrastructure overview")[0], "general_query")
+        self.assertEqual(classify_issue("list all servers")[0], "general_query")
+
+    def test_incident_mentioning_status_needs_resolution(self):
+        self.assertEqual(classify_issue("nginx status: down on web servers, please fix")[0], "needs_resolution")
+
+    def test_incident_mentioning_server_list_needs_resolution(self):
+        self.assertEqual(classify_issue("list of servers failing with disk error")[0], "needs_resolution")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from core.command import _rewrite_ping
+from core.command_map import get_command, resolve_os
+
+SERVER = 'web01'
+IP = '192.168.56.11'
+
+
+class RewritePingTest(unittest.TestCase):
+    def test_bare_ping_targets_server_ip(self):
+        self.assertEqual(_rewrite_ping('ping', SERVER, IP), f'ping -c 4 {IP}')
+
+    def test_localhost_is_replaced_by_server(self):
+        self.assertEqual(_rewrite_ping('ping -c 2 localhost', SERVER, IP), f'ping -c 2 {SERVER}')
+        self.assertEqual(_rewrite_ping('ping6 localhost', SERVER, IP), f'ping6 {SERVER}')
+
+    def test_parameters_without_host_get_server_ip(self):
+        self.assertEqual(_rewrite_ping('ping -c 2', SERVER, IP), f'ping -c 2 {IP}')
+        self.assertEqual(_rewrite_ping('ping6 -c 2', SERVER, IP), f'ping6 -c 2 {IP}')
+
+    def test_explicit_host_is_kept(self):
+        self.assertEqual(_rewrite_ping('ping -c 2 10.0.0.1', SERVER, IP), 'ping -c 2 10.0.0.1')
+        self.assertEqual(_rewrite_ping('ping db01.example.com', SERVER, IP), 'ping db01.example.com')
+
+    def test_other_commands_are_untouched(self):
+        self.assertEqual(_rewrite_ping('pinger localhost', SERVER, IP), 'pinger localhost')
+        self.assertEqual(_rewrite_ping('uptime', SERVER, IP), 'uptime')
+        self.assertEqual(_rewrite_ping('ping6', SERVER, IP), 'ping6')
+
+
+class ResolveOsTest(unittest.TestCase):
+    def test_configured_names(self):
+        self.assertEqual(resolve_os('linux'), 'linux')
+        self.assertEqual(resolve_os('CentOS/Stream9'), 'centos/stream9')
+        self.assertEqual(resolve_os('ubuntu/jammy64'), 'ubuntu/jammy64')
+
+    def test_versioned_names_resolve_to_their_family(self):
+        self.assertEqual(resolve_os('centos7'), 'centos/stream9')
+        self.assertEqual(resolve_os('CentOS/8'), 'centos/stream9')
+        self.assertEqual(resolve_os('ubuntu-22.04'), 'ubuntu/jammy64')
+        self.assertEqual(resolve_os('Ubuntu/focal64'), 'ubuntu/jammy64')
+
+    def test_unsupported_names(self):
+        self.assertEqual(resolve_os('windows'), '')
+        self.assertEqual(resolve_os(''), '')
+        self.assertEqual(get_command('windows', 'cpu'), '')
+
+    def test_versioned_names_get_family_commands(self):
+        self.assertEqual(get_command('centos7', 'cpu'), get_command('centos/stream9', 'cpu'))
+
+
+if __name__ == '__main__':
+    unittest.main()
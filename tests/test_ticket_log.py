@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import orjson
+
+import orchestrator
+
+
+class TicketLogTestCase(unittest.TestCase):
+    """Points the ticket log at a temporary directory for each test"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.ticket_file = os.path.join(tmp.name, 'ticket.jsonl')
+        patcher = mock.patch.multiple(
+            orchestrator,
+            TICKET_DIR=tmp.name,
+            TICKET_FILE=self.ticket_file,
+            TICKET_ROTATE_LOCK=os.path.join(tmp.name, '.ticket.lock'),
+            LEGACY_TICKET_FILE=os.path.join(tmp.name, 'ticket.json'),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._close_ticket_file)
+
+    @staticmethod
+    def _close_ticket_file():
+        if orchestrator._ticket_file is not None:
+            orchestrator._ticket_file.close()
+            orchestrator._ticket_file = None
+
+    def write_tickets(self, *tickets):
+        orchestrator._write_ticket_records([orjson.dumps(ticket) + b'\n' for ticket in tickets])
+        orchestrator._ticket_file.flush()
+
+
+class JsonlRoundTripTest(TicketLogTestCase):
+    def test_torn_last_line_is_read_once_complete(self):
+        first = orjson.dumps({'id': 'T1', 'status': 'pending', 'updated_ns': 1}) + b'\n'
+        second = orjson.dumps({'id': 'T2', 'status': 'pending', 'updated_ns': 2}) + b'\n'
+        with open(self.ticket_file, 'wb') as f:
+            f.write(first + second[:10])
+
+        crew = orchestrator.SupportCrew()
+        self.assertEqual([t['id'] for t in crew.get_ticket_log()], ['T1'])
+
+        with open(self.ticket_file, 'ab') as f:
+            f.write(second[10:])
+        self.assertEqual(sorted(t['id'] for t in crew.get_ticket_log()), ['T1', 'T2'])
+
+    def test_malformed_line_is_skipped(self):
+        with open(self.ticket_file, 'wb') as f:
+            f.write(b'{not json}\n' + orjson.dumps({'id': 'T1', 'updated_ns': 1}) + b'\n')
+
+        crew = orchestrator.SupportCrew()
+
+        self.assertEqual([t['id'] for t in crew.get_ticket_log()], ['T1'])
+
+
+class IncrementalRefreshTest(TicketLogTestCase):
+    def test_tickets_saved_by_one_crew_reach_another(self):
+        writer = orchestrator.SupportCrew()
+        reader = orchestrator.SupportCrew()
+        self.assertEqual(reader.get_ticket_log(), [])
+
+        ticket = {'id': 'T1', 'status': 'pending'}
+        writer._save_ticket(ticket)
+        orchestrator._TICKET_Q.join()
+        self.assertEqual([t['status'] for t in reader.get_ticket_log()], ['pending'])
+
+        ticket['status'] = 'completed'
+        writer._save_ticket(ticket)
+        orchestrator._TICKET_Q.join()
+        self.assertEqual([t['status'] for t in reader.get_ticket_log()], ['completed'])
+
+    def test_older_record_does_not_replace_newer_state(self):
+        self.write_tickets({'id': 'T1', 'status': 'completed', 'updated_ns': 2},
+                           {'id': 'T1', 'status': 'pending', 'updated_ns': 1})
+
+        crew = orchestrator.SupportCrew()
+
+        self.assertEqual([t['status'] for t in crew.get_ticket_log()], ['completed'])
+
+
+class RotationTest(TicketLogTestCase):
+    def test_restart_after_rotation_loads_archived_tickets(self):
+        self.write_tickets({'id': 'T1', 'status': 'pending', 'updated_ns': 1},
+                           {'id': 'T2', 'status': 'pending', 'updated_ns': 2})
+        with mock.patch.object(orchestrator, 'TICKET_ROTATE_BYTES', 1):
+            orchestrator._rotate_ticket_log()
+        self.assertFalse(os.path.exists(self.ticket_file))
+        self.assertEqual(len(orchestrator.ticket_archives()), 1)
+
+        crew = orchestrator.SupportCrew()
+
+        self.assertEqual(sorted(t['id'] for t in crew.get_ticket_log()), ['T1', 'T2'])
+
+    @unittest.skipIf(orchestrator.zstandard is None, "zstandard is not installed")
+    def test_restart_reads_compressed_archives_and_live_log(self):
+        self.write_tickets({'id': 'T1', 'status': 'pending', 'updated_ns': 1})
+        with mock.patch.object(orchestrator, 'TICKET_ROTATE_BYTES', 1):
+            orchestrator._rotate_ticket_log()
+        with mock.patch.object(orchestrator, 'TICKET_ARCHIVE_GRACE', -1):
+            orchestrator._compress_ticket_archives()
+        self.assertTrue(orchestrator.ticket_archives()[0].endswith('.zst'))
+        self.write_tickets({'id': 'T1', 'status': 'completed', 'updated_ns': 3},
+                           {'id': 'T2', 'status': 'pending', 'updated_ns': 2})
+
+        crew = orchestrator.SupportCrew()
+
+        statuses = {t['id']: t['status'] for t in crew.get_ticket_log()}
+        self.assertEqual(statuses, {'T1': 'completed', 'T2': 'pending'})
+
+
+if __name__ == '__main__':
+    unittest.main()